@@ -1,22 +1,34 @@
+import asyncio
 import os
-import pickle
-from typing import Optional
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
+import orjson
+from google.auth.exceptions import GoogleAuthError
 from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from config.settings import settings
 from config.logging_config import get_logger
 
+if TYPE_CHECKING:
+    # Heavy Google client modules are imported lazily where they are used
+    from google.oauth2.credentials import Credentials
+
 logger = get_logger('ai_agent')
 
+# Treat cached credentials as stale this many seconds before they actually expire
+CREDENTIALS_REFRESH_MARGIN = 300
+
+# Minimum seconds between token refresh attempts
+REFRESH_RETRY_INTERVAL = 30
+
 class GoogleAuthService:
     """Service for handling Google OAuth authentication"""
     
     def __init__(self):
         """Initialize Google Auth Service"""
         self.scopes = settings.GOOGLE_SCOPES
-        self.credentials_file = settings.CREDENTIALS_FILE
         
         # FIXED: Move token file to a permanent directory, not temp
         # Create auth directory if it doesn't exist
@@ -24,36 +36,247 @@ class GoogleAuthService:
         os.makedirs(auth_dir, exist_ok=True)
         
         # Store token in permanent auth directory instead of temp
-        self.token_file = os.path.join(auth_dir, 'google_token.pickle')
+        self.token_path = Path(auth_dir) / 'google_token.json'
+        self.token_file = str(self.token_path)
+        
+        # Token pickled by earlier versions; converted to JSON on first load
+        self.legacy_token_path = Path(auth_dir) / 'google_token.pickle'
         
         self.credentials = None
-        logger.info(f"GoogleAuthService initialized - Token will be stored at: {self.token_file}")
+        
+        # In-memory credentials cache (monotonic deadline for serving cache hits)
+        self._cache_lock = threading.Lock()
+        # Serializes background token refreshes; never taken on the event loop
+        self._refresh_lock = threading.Lock()
+        self._cred_exp = 0.0
+        
+        # Built API clients keyed by (service name, version)
+        self._services = {}
+        
+        # Timer for the proactive background token refresh
+        self._refresh_handle = None
+        
+        # Monotonic time of the last refresh attempt (bounds retries on errors)
+        self._last_refresh_attempt = 0.0
+        logger.info("GoogleAuthService initialized - Token will be stored at: %s", self.token_file)
+    
+    def _load_token(self) -> Optional['Credentials']:
+        """
+        Load stored credentials from the JSON token file
+        
+        Returns:
+            Optional[Credentials]: Stored credentials or None if no token exists
+        """
+        # A single open() both checks for and reads the token
+        try:
+            token_info = orjson.loads(self.token_path.read_bytes())
+        except FileNotFoundError:
+            return self._migrate_legacy_token()
+        
+        from google.oauth2.credentials import Credentials
+        
+        return Credentials.from_authorized_user_info(token_info, self.scopes)
     
-    def _create_credentials_file(self):
-        """Create credentials.json file from environment variables"""
+    def _migrate_legacy_token(self) -> Optional['Credentials']:
+        """
+        Convert a token pickled by earlier versions into the JSON token file
+        
+        Existing deployments keep their authorization instead of dropping into
+        the interactive OAuth flow, which blocks on a headless host.
+        
+        Returns:
+            Optional[Credentials]: Migrated credentials or None if there is no usable legacy token
+        """
         try:
-            credentials_data = {
-                "installed": {
-                    "client_id": settings.GOOGLE_CLIENT_ID,
-                    "client_secret": settings.GOOGLE_CLIENT_SECRET,
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                    "redirect_uris": ["urn:ietf:wg:oauth:2.0:oob", "http://localhost"]
-                }
-            }
-            
-            import json
-            with open(self.credentials_file, 'w') as f:
-                json.dump(credentials_data, f, indent=2)
+            legacy_data = self.legacy_token_path.read_bytes()
+        except FileNotFoundError:
+            return None
+        
+        import pickle
+        
+        try:
+            # Only ever written by this service, before the JSON token format
+            creds = pickle.loads(legacy_data)
+        except (pickle.UnpicklingError, AttributeError, EOFError, ImportError) as e:
+            logger.error("Could not read legacy token %s: %s", self.legacy_token_path, e)
+            return None
+        
+        self._save_token(creds)
+        self.legacy_token_path.unlink()
+        logger.info("Migrated legacy token %s to %s", self.legacy_token_path, self.token_file)
+        return creds
+    
+    def _save_token(self, creds: 'Credentials') -> None:
+        """
+        Persist credentials to the JSON token file atomically
+        
+        Args:
+            creds (Credentials): Credentials to store
+        """
+        tmp_file = f"{self.token_file}.tmp"
+        with open(tmp_file, 'wb') as token:
+            token.write(creds.to_json().encode('utf-8'))
+        os.replace(tmp_file, self.token_file)
+    
+    def _update_cache_expiry(self, creds: Optional['Credentials']) -> None:
+        """
+        Set the monotonic deadline until which cached credentials are served
+        
+        Args:
+            creds (Optional[Credentials]): Credentials that were just loaded or refreshed
+        """
+        if not creds or not creds.valid:
+            self._cred_exp = 0.0
+        elif creds.expiry is None:
+            # Credentials without expiry never go stale on their own
+            self._cred_exp = float('inf')
+        else:
+            # google-auth stores expiry as naive UTC
+            remaining = (creds.expiry - datetime.utcnow()).total_seconds()
+            self._cred_exp = time.monotonic() + remaining - CREDENTIALS_REFRESH_MARGIN
+    
+    def _schedule_refresh(self, creds: Optional['Credentials']) -> None:
+        """
+        Schedule a background refresh shortly before the credentials expire
+        
+        Args:
+            creds (Optional[Credentials]): Credentials that were just loaded or refreshed
+        """
+        if self._refresh_handle:
+            self._refresh_handle.cancel()
+            self._refresh_handle = None
+        
+        if not creds or not creds.refresh_token or creds.expiry is None:
+            return
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (e.g. CLI usage) - callers fall back to lazy refresh
+            return
+        
+        remaining = (creds.expiry - datetime.utcnow()).total_seconds()
+        delay = max(remaining - CREDENTIALS_REFRESH_MARGIN, 0)
+        self._refresh_handle = loop.call_later(
+            delay, lambda: loop.create_task(self._background_refresh())
+        )
+        logger.info("Next credentials refresh scheduled in %.0fs", delay)
+    
+    def _refresh_credentials(self) -> Optional['Credentials']:
+        """Refresh the in-memory credentials and persist the new token"""
+        with self._refresh_lock:
+            with self._cache_lock:
+                creds = self.credentials
+                if creds and creds.valid and not self._expires_soon(creds):
+                    # Another caller refreshed while this one waited for the lock
+                    return creds
+                self._last_refresh_attempt = time.monotonic()
+            if not creds or not creds.refresh_token:
+                return None
             
-            logger.info("Created credentials.json from environment variables")
-            return True
+            # The network round trip runs without the cache lock so event-loop
+            # readers are never blocked; the current token stays valid meanwhile
+            creds.refresh(Request())
+            self._save_token(creds)
             
+            with self._cache_lock:
+                self._update_cache_expiry(creds)
+            return creds
+    
+    async def _background_refresh(self) -> None:
+        """Refresh credentials off the event loop, then schedule the next refresh"""
+        self._refresh_handle = None
+        try:
+            logger.info("Proactively refreshing Google credentials...")
+            creds = await asyncio.to_thread(self._refresh_credentials)
+            self._schedule_refresh(creds)
         except Exception as e:
-            logger.error(f"Error creating credentials file: {str(e)}")
+            # Leave recovery to the lazy refresh on the next request
+            logger.error("Background credentials refresh failed: %s", e)
+    
+    def _expires_soon(self, creds: 'Credentials') -> bool:
+        """Check whether credentials expire within the refresh margin"""
+        if creds.expiry is None:
             return False
+        remaining = (creds.expiry - datetime.utcnow()).total_seconds()
+        return remaining < CREDENTIALS_REFRESH_MARGIN
+    
+    def _current_credentials(self) -> Optional['Credentials']:
+        """Return the in-memory credentials, loading the token file on first use (caller holds _cache_lock)"""
+        if not self.credentials:
+            creds = self._load_token()
+            if creds:
+                logger.info("Loaded existing authentication token from: %s", self.token_file)
+                # Clients are bound to the credentials object they were built with
+                self._services.clear()
+                self.credentials = creds
+        return self.credentials
+    
+    def _track_valid_credentials(self, creds: 'Credentials') -> None:
+        """
+        Keep proactive refreshes going for credentials that are still valid (caller holds _cache_lock)
+        
+        Inside the refresh margin this starts at most one background refresh per
+        retry interval instead of re-arming a new one on every call.
+        
+        Args:
+            creds (Credentials): Valid in-memory credentials
+        """
+        if not self._expires_soon(creds):
+            self._update_cache_expiry(creds)
+            self._schedule_refresh(creds)
+        elif time.monotonic() - self._last_refresh_attempt >= REFRESH_RETRY_INTERVAL:
+            self._last_refresh_attempt = time.monotonic()
+            self._schedule_refresh(creds)
+    
+    def _get_cached_credentials(self) -> Optional['Credentials']:
+        """Return in-memory credentials if they are valid and not close to expiry"""
+        with self._cache_lock:
+            if self.credentials and self.credentials.valid and time.monotonic() < self._cred_exp:
+                return self.credentials
+        return None
+    
+    def _get_credentials(self) -> Optional['Credentials']:
+        """
+        Get valid credentials, serving from the in-memory cache when possible
+        
+        Returns:
+            Optional[Credentials]: Valid credentials or None if authentication failed
+        """
+        creds = self._get_cached_credentials()
+        if creds:
+            return creds
+        
+        return self.authenticate()
     
-    def authenticate(self) -> Optional[Credentials]:
+    def _build_service(self, name: str, version: str):
+        """
+        Get a memoized Google API client for the current credentials
+        
+        Args:
+            name (str): API name (e.g., "calendar")
+            version (str): API version (e.g., "v3")
+            
+        Returns:
+            Google API service object
+        """
+        key = (name, version)
+        service = self._services.get(key)
+        if service is None:
+            from googleapiclient.discovery import build
+            
+            # Use the discovery document bundled with the client library
+            service = build(
+                name, version,
+                credentials=self.credentials,
+                cache_discovery=False,
+                static_discovery=True
+            )
+            self._services[key] = service
+            logger.info("%s service initialized successfully", name.title())
+        return service
+    
+    def authenticate(self) -> Optional['Credentials']:
         """
         Authenticate with Google services
         
@@ -61,49 +284,51 @@ class GoogleAuthService:
             Optional[Credentials]: Google credentials object or None if failed
         """
         try:
-            creds = None
-            
-            # Load existing token
-            if os.path.exists(self.token_file):
-                logger.info(f"Loading existing authentication token from: {self.token_file}")
-                with open(self.token_file, 'rb') as token:
-                    creds = pickle.load(token)
-            
-            # Check if credentials are valid
-            if not creds or not creds.valid:
-                if creds and creds.expired and creds.refresh_token:
-                    logger.info("Refreshing expired credentials...")
-                    creds.refresh(Request())
-                else:
-                    logger.info("Starting new authentication flow...")
-                    
-                    # Create credentials file if it doesn't exist
-                    if not os.path.exists(self.credentials_file):
-                        if not self._create_credentials_file():
-                            logger.error("Failed to create credentials file")
-                            return None
-                    
-                    # Run OAuth flow
-                    flow = InstalledAppFlow.from_client_secrets_file(
-                        self.credentials_file, self.scopes
-                    )
-                    
-                    # Use local server flow for better user experience
-                    creds = flow.run_local_server(port=8080, open_browser=False)
-                    
-                    logger.info("Authentication completed successfully")
+            # Reuse in-memory credentials before falling back to the token file
+            with self._cache_lock:
+                creds = self._current_credentials()
+                if creds and creds.valid:
+                    # Still usable; a token close to expiry is refreshed in the background
+                    self._track_valid_credentials(creds)
+                    return creds
+            
+            if creds and creds.refresh_token:
+                logger.info("Refreshing expired credentials...")
+                creds = self._refresh_credentials()
+                self._schedule_refresh(creds)
+                return creds
+            
+            # Only one interactive flow runs at a time; cache readers are not blocked
+            with self._refresh_lock:
+                logger.info("Starting new authentication flow...")
+                
+                # Run OAuth flow with the client config built in memory
+                from google_auth_oauthlib.flow import InstalledAppFlow
+                
+                flow = InstalledAppFlow.from_client_config(
+                    settings.google_client_config, self.scopes
+                )
+                
+                # Use local server flow for better user experience
+                creds = flow.run_local_server(port=8080, open_browser=False)
+                
+                logger.info("Authentication completed successfully")
                 
                 # Save credentials for next run in permanent location
-                with open(self.token_file, 'wb') as token:
-                    pickle.dump(creds, token)
+                self._save_token(creds)
+                
+                logger.info("Credentials saved permanently to: %s", self.token_file)
                 
-                logger.info(f"Credentials saved permanently to: {self.token_file}")
+                with self._cache_lock:
+                    self._services.clear()
+                    self.credentials = creds
+                    self._update_cache_expiry(creds)
             
-            self.credentials = creds
+            self._schedule_refresh(creds)
             return creds
             
-        except Exception as e:
-            logger.error(f"Authentication error: {str(e)}")
+        except (GoogleAuthError, OSError, ValueError) as e:
+            logger.error("Authentication error: %s", e)
             return None
     
     def get_calendar_service(self):
@@ -114,19 +339,14 @@ class GoogleAuthService:
             Google Calendar service object or None if failed
         """
         try:
-            if not self.credentials:
-                self.credentials = self.authenticate()
-            
-            if not self.credentials:
+            if not self._get_credentials():
                 logger.error("No valid credentials available for Calendar service")
                 return None
             
-            service = build('calendar', 'v3', credentials=self.credentials)
-            logger.info("Calendar service initialized successfully")
-            return service
+            return self._build_service('calendar', 'v3')
             
-        except Exception as e:
-            logger.error(f"Error creating Calendar service: {str(e)}")
+        except (GoogleAuthError, OSError) as e:
+            logger.error("Error creating Calendar service: %s", e)
             return None
     
     def get_gmail_service(self):
@@ -137,19 +357,14 @@ class GoogleAuthService:
             Gmail service object or None if failed
         """
         try:
-            if not self.credentials:
-                self.credentials = self.authenticate()
-            
-            if not self.credentials:
+            if not self._get_credentials():
                 logger.error("No valid credentials available for Gmail service")
                 return None
             
-            service = build('gmail', 'v1', credentials=self.credentials)
-            logger.info("Gmail service initialized successfully")
-            return service
+            return self._build_service('gmail', 'v1')
             
-        except Exception as e:
-            logger.error(f"Error creating Gmail service: {str(e)}")
+        except (GoogleAuthError, OSError) as e:
+            logger.error("Error creating Gmail service: %s", e)
             return None
     
     def revoke_credentials(self) -> bool:
@@ -160,19 +375,28 @@ class GoogleAuthService:
             bool: True if successful, False otherwise
         """
         try:
-            # Remove token file
-            if os.path.exists(self.token_file):
-                os.remove(self.token_file)
-                logger.info("Token file removed")
+            # Remove token files (a leftover legacy token would be migrated back)
+            for path in (self.token_path, self.legacy_token_path):
+                try:
+                    path.unlink()
+                    logger.info("Token file removed: %s", path)
+                except FileNotFoundError:
+                    pass
             
             # Reset credentials
-            self.credentials = None
+            with self._cache_lock:
+                self.credentials = None
+                self._cred_exp = 0.0
+                self._services.clear()
+            
+            # Stop proactive refreshes for the revoked token
+            self._schedule_refresh(None)
             
             logger.info("Credentials revoked successfully")
             return True
             
-        except Exception as e:
-            logger.error(f"Error revoking credentials: {str(e)}")
+        except OSError as e:
+            logger.error("Error revoking credentials: %s", e)
             return False
     
     def is_authenticated(self) -> bool:
@@ -183,24 +407,30 @@ class GoogleAuthService:
             bool: True if authenticated, False otherwise
         """
         try:
-            if not self.credentials:
-                # Try to load existing credentials
-                if os.path.exists(self.token_file):
-                    with open(self.token_file, 'rb') as token:
-                        self.credentials = pickle.load(token)
-            
-            if self.credentials and self.credentials.valid:
+            if self._get_cached_credentials():
                 return True
             
-            if self.credentials and self.credentials.expired and self.credentials.refresh_token:
-                # Try to refresh
-                self.credentials.refresh(Request())
-                return self.credentials.valid
+            with self._cache_lock:
+                creds = self._current_credentials()
+                
+                if creds and creds.valid:
+                    self._track_valid_credentials(creds)
+                    return True
+                
+                if not (creds and creds.expired and creds.refresh_token):
+                    return False
+                
+                # Don't hammer the token endpoint while refreshes keep failing
+                if time.monotonic() - self._last_refresh_attempt < REFRESH_RETRY_INTERVAL:
+                    return False
             
-            return False
+            # Refresh outside the cache lock; concurrent refreshes are serialized
+            creds = self._refresh_credentials()
+            self._schedule_refresh(creds)
+            return bool(creds and creds.valid)
             
-        except Exception as e:
-            logger.error(f"Error checking authentication status: {str(e)}")
+        except (GoogleAuthError, OSError, ValueError) as e:
+            logger.error("Error checking authentication status: %s", e)
             return False
     
     def get_user_info(self) -> Optional[dict]:
@@ -210,13 +440,15 @@ class GoogleAuthService:
         Returns:
             Optional[dict]: User info or None if failed
         """
+        from googleapiclient.errors import HttpError
+        
         try:
             if not self.is_authenticated():
                 logger.error("User not authenticated")
                 return None
             
             # Build People API service to get user info
-            people_service = build('people', 'v1', credentials=self.credentials)
+            people_service = self._build_service('people', 'v1')
             
             # Get user's profile information
             profile = people_service.people().get(
@@ -237,11 +469,11 @@ class GoogleAuthService:
             if 'emailAddresses' in profile:
                 user_info['email'] = profile['emailAddresses'][0].get('value')
             
-            logger.info(f"Retrieved user info: {user_info['name']} <{user_info['email']}>")
+            logger.info("Retrieved user info: %s <%s>", user_info['name'], user_info['email'])
             return user_info
             
-        except Exception as e:
-            logger.error(f"Error getting user info: {str(e)}")
+        except (GoogleAuthError, HttpError, OSError) as e:
+            logger.error("Error getting user info: %s", e)
             return None
 
 # Create global instance
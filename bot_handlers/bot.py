@@ -1,4 +1,6 @@
 import asyncio
+import os
+import aiofiles
 from telegram.ext import (
     ApplicationBuilder,
     CommandHandler,
@@ -7,7 +9,7 @@ from telegram.ext import (
     ContextTypes
 )
 from telegram.error import TelegramError
-from telegram import Update
+from telegram import Update, InputMediaPhoto
 from config.settings import settings
 from config.logging_config import get_logger
 # Fixed import path
@@ -15,6 +17,33 @@ from bot_handlers.telegram_handlers import telegram_handlers
 
 logger = get_logger('telegram_bot')
 
+# Telegram accepts at most this many items per media group
+MEDIA_GROUP_LIMIT = 10
+
+# Threads used to delete temp files on shutdown
+CLEANUP_WORKERS = 16
+
+# Combined filter for plain text messages (built once)
+TEXT_NON_COMMAND = filters.TEXT & ~filters.COMMAND
+
+# Handlers in registration order - the unknown command handler must be last
+HANDLERS = (
+    # Command handlers
+    CommandHandler("start", telegram_handlers.start_handler),
+    CommandHandler("help", telegram_handlers.help_handler),
+    CommandHandler("cleanup", telegram_handlers.cleanup_handler),
+    
+    # Message handlers
+    MessageHandler(TEXT_NON_COMMAND, telegram_handlers.text_message_handler),
+    MessageHandler(filters.VOICE, telegram_handlers.voice_message_handler),
+    MessageHandler(filters.AUDIO, telegram_handlers.voice_message_handler),
+    MessageHandler(filters.PHOTO, telegram_handlers.photo_message_handler),
+    MessageHandler(filters.Document.ALL, telegram_handlers.document_message_handler),
+    
+    # Unknown command handler
+    MessageHandler(filters.COMMAND, telegram_handlers.unknown_handler),
+)
+
 class TelegramBot:
     """Main Telegram Bot class"""
     
@@ -23,67 +52,14 @@ class TelegramBot:
         self.token = settings.TELEGRAM_TOKEN
         self.application = None
         self.is_running = False
+        self._stop_event = None
         logger.info("TelegramBot initialized")
     
     def setup_handlers(self):
         """Setup all message handlers"""
         try:
-            # Command handlers
-            self.application.add_handler(
-                CommandHandler("start", telegram_handlers.start_handler)
-            )
-            
-            self.application.add_handler(
-                CommandHandler("help", telegram_handlers.help_handler)
-            )
-            
-            self.application.add_handler(
-                CommandHandler("cleanup", telegram_handlers.cleanup_handler)
-            )
-            
-            # Message handlers
-            self.application.add_handler(
-                MessageHandler(
-                    filters.TEXT & ~filters.COMMAND,
-                    telegram_handlers.text_message_handler
-                )
-            )
-            
-            self.application.add_handler(
-                MessageHandler(
-                    filters.VOICE,
-                    telegram_handlers.voice_message_handler
-                )
-            )
-            
-            self.application.add_handler(
-                MessageHandler(
-                    filters.AUDIO,
-                    telegram_handlers.voice_message_handler
-                )
-            )
-            
-            self.application.add_handler(
-                MessageHandler(
-                    filters.PHOTO,
-                    telegram_handlers.photo_message_handler
-                )
-            )
-            
-            self.application.add_handler(
-                MessageHandler(
-                    filters.Document.ALL,
-                    telegram_handlers.document_message_handler
-                )
-            )
-            
-            # Unknown command handler - should be last
-            self.application.add_handler(
-                MessageHandler(
-                    filters.COMMAND,
-                    telegram_handlers.unknown_handler
-                )
-            )
+            # Register all handlers in group 0 with a single call
+            self.application.add_handlers(HANDLERS)
             
             # Error handler
             self.application.add_error_handler(telegram_handlers.error_handler)
@@ -91,14 +67,14 @@ class TelegramBot:
             logger.info("✅ All handlers setup successfully")
             
         except Exception as e:
-            logger.error(f"Error setting up handlers: {str(e)}")
+            logger.error("Error setting up handlers: %s", e)
             raise e
     
     async def post_init(self, application):
         """Post initialization setup"""
         try:
             bot_info = await application.bot.get_me()
-            logger.info(f"✅ Bot initialized: @{bot_info.username} ({bot_info.first_name})")
+            logger.info("✅ Bot initialized: @%s (%s)", bot_info.username, bot_info.first_name)
             
             # Set bot commands for better UX
             from telegram import BotCommand
@@ -113,7 +89,7 @@ class TelegramBot:
             logger.info("✅ Bot commands set successfully")
             
         except Exception as e:
-            logger.error(f"Error in post initialization: {str(e)}")
+            logger.error("Error in post initialization: %s", e)
     
     async def post_shutdown(self, application):
         """Post shutdown cleanup"""
@@ -122,24 +98,34 @@ class TelegramBot:
             
             # FIXED: Only clean up temporary files, preserve Google auth token
             from utils.file_handler import file_handler
-            import os
-            from config.settings import settings
-            
-            # Get the Google auth token file path
-            token_file = os.path.join(settings.TEMP_DIR, 'token.pickle')
+            from auth.google_auth import google_auth
             
             # Perform selective cleanup - exclude Google auth token
-            cleanup_result = file_handler.cleanup_old_files(
+            # Run off the event loop and delete files concurrently
+            token_path = google_auth.token_path
+            cleanup_result = await asyncio.to_thread(
+                file_handler.cleanup_old_files,
                 max_age_hours=0,  # Clean all temp files
-                exclude_files=[token_file, 'token.pickle']  # But exclude Google auth token
+                exclude_files=[str(token_path), token_path.name],  # But exclude Google auth token
+                max_workers=CLEANUP_WORKERS
             )
             
             if cleanup_result["success"]:
-                logger.info(f"✅ Cleanup on shutdown: {cleanup_result['deleted_count']} files deleted")
+                logger.info("✅ Cleanup on shutdown: %s files deleted", cleanup_result['deleted_count'])
                 logger.info("🔐 Google auth token preserved for next session")
             
+            # Bound the speech cache, which outlives the temp files it was linked from
+            from core.agent_brain import ai_agent
+            tts_result = await ai_agent.cleanup_tts_cache()
+            if tts_result["success"]:
+                logger.info("✅ TTS cache sweep: %s files deleted", tts_result['deleted_count'])
+            
+            # Keep the semantic cache warm across restarts
+            from core.llm_handler import get_llm_handler
+            await asyncio.to_thread(get_llm_handler().save_caches)
+            
         except Exception as e:
-            logger.error(f"Error in post shutdown: {str(e)}")
+            logger.error("Error in post shutdown: %s", e)
     
     def create_application(self):
         """Create the Telegram application"""
@@ -161,7 +147,7 @@ class TelegramBot:
             return self.application
             
         except Exception as e:
-            logger.error(f"Error creating Telegram application: {str(e)}")
+            logger.error("Error creating Telegram application: %s", e)
             raise e
     
     async def start_polling(self):
@@ -170,6 +156,8 @@ class TelegramBot:
             if not self.application:
                 self.create_application()
             
+            self._stop_event = asyncio.Event()
+            
             logger.info("🚀 Starting Telegram bot polling...")
             
             # Start the bot
@@ -185,16 +173,15 @@ class TelegramBot:
             self.is_running = True
             logger.info("✅ Telegram bot is running and listening for messages...")
             
-            # Keep the bot running
-            while self.is_running:
-                await asyncio.sleep(1)
+            # Keep the bot running until stop() is called
+            await self._stop_event.wait()
                 
         except TelegramError as e:
-            logger.error(f"Telegram API error: {str(e)}")
+            logger.error("Telegram API error: %s", e)
             self.is_running = False
             raise e
         except Exception as e:
-            logger.error(f"Error starting bot: {str(e)}")
+            logger.error("Error starting bot: %s", e)
             self.is_running = False
             raise e
         finally:
@@ -206,7 +193,9 @@ class TelegramBot:
             if not self.application:
                 self.create_application()
             
-            logger.info(f"🚀 Starting Telegram bot webhook on {webhook_url}:{port}")
+            self._stop_event = asyncio.Event()
+            
+            logger.info("🚀 Starting Telegram bot webhook on %s:%s", webhook_url, port)
             
             await self.application.initialize()
             await self.application.start()
@@ -220,12 +209,11 @@ class TelegramBot:
             self.is_running = True
             logger.info("✅ Telegram bot webhook is running...")
             
-            # Keep the bot running
-            while self.is_running:
-                await asyncio.sleep(1)
+            # Keep the bot running until stop() is called
+            await self._stop_event.wait()
                 
         except Exception as e:
-            logger.error(f"Error starting webhook: {str(e)}")
+            logger.error("Error starting webhook: %s", e)
             self.is_running = False
             raise e
         finally:
@@ -238,6 +226,8 @@ class TelegramBot:
                 logger.info("🛑 Stopping Telegram bot...")
                 
                 self.is_running = False
+                if self._stop_event:
+                    self._stop_event.set()
                 
                 await self.application.updater.stop()
                 await self.application.stop()
@@ -246,7 +236,7 @@ class TelegramBot:
                 logger.info("✅ Telegram bot stopped successfully")
                 
         except Exception as e:
-            logger.error(f"Error stopping bot: {str(e)}")
+            logger.error("Error stopping bot: %s", e)
     
     async def send_message(self, chat_id: int, text: str, **kwargs):
         """Send a message to a specific chat"""
@@ -263,8 +253,8 @@ class TelegramBot:
             
             return True
             
-        except Exception as e:
-            logger.error(f"Error sending message: {str(e)}")
+        except TelegramError as e:
+            logger.error("Error sending message: %s", e)
             return False
     
     async def send_audio(self, chat_id: int, audio_path: str, **kwargs):
@@ -274,17 +264,21 @@ class TelegramBot:
                 logger.error("Bot not initialized")
                 return False
             
-            with open(audio_path, 'rb') as audio_file:
-                await self.application.bot.send_audio(
-                    chat_id=chat_id,
-                    audio=audio_file,
-                    **kwargs
-                )
+            # Read without blocking other concurrent updates
+            async with aiofiles.open(audio_path, 'rb') as audio_file:
+                audio_data = await audio_file.read()
+            
+            await self.application.bot.send_audio(
+                chat_id=chat_id,
+                audio=audio_data,
+                filename=kwargs.pop('filename', os.path.basename(audio_path)),
+                **kwargs
+            )
             
             return True
             
-        except Exception as e:
-            logger.error(f"Error sending audio: {str(e)}")
+        except (TelegramError, OSError) as e:
+            logger.error("Error sending audio: %s", e)
             return False
     
     async def send_photo(self, chat_id: int, photo_path: str, caption: str = None, **kwargs):
@@ -294,18 +288,83 @@ class TelegramBot:
                 logger.error("Bot not initialized")
                 return False
             
-            with open(photo_path, 'rb') as photo_file:
-                await self.application.bot.send_photo(
-                    chat_id=chat_id,
-                    photo=photo_file,
-                    caption=caption,
-                    **kwargs
+            # Read without blocking other concurrent updates
+            async with aiofiles.open(photo_path, 'rb') as photo_file:
+                photo_data = await photo_file.read()
+            
+            await self.application.bot.send_photo(
+                chat_id=chat_id,
+                photo=photo_data,
+                caption=caption,
+                filename=kwargs.pop('filename', os.path.basename(photo_path)),
+                **kwargs
+            )
+            
+            return True
+            
+        except (TelegramError, OSError) as e:
+            logger.error("Error sending photo: %s", e)
+            return False
+    
+    async def send_photos(self, chat_id: int, photo_paths: list, caption: str = None, **kwargs):
+        """
+        Send several photos to a specific chat as media groups
+        
+        Up to MEDIA_GROUP_LIMIT photos go out in one request. A single photo
+        falls back to send_photo, since media groups need at least two items.
+        
+        Args:
+            chat_id (int): Target chat
+            photo_paths (list): Paths of the photos to send
+            caption (str): Caption shown on the first photo
+            
+        Returns:
+            bool: True if all photos were sent, False otherwise
+        """
+        if len(photo_paths) == 1:
+            return await self.send_photo(chat_id, photo_paths[0], caption=caption, **kwargs)
+        
+        try:
+            if not self.application:
+                logger.error("Bot not initialized")
+                return False
+            
+            # Read all files concurrently without blocking other updates
+            async def read_photo(photo_path: str) -> bytes:
+                async with aiofiles.open(photo_path, 'rb') as photo_file:
+                    return await photo_file.read()
+            
+            photos_data = await asyncio.gather(*(read_photo(path) for path in photo_paths))
+            
+            media = [
+                InputMediaPhoto(
+                    media=photo_data,
+                    caption=caption if i == 0 else None,
+                    filename=os.path.basename(photo_path)
                 )
+                for i, (photo_path, photo_data) in enumerate(zip(photo_paths, photos_data))
+            ]
+            
+            for start in range(0, len(media), MEDIA_GROUP_LIMIT):
+                group = media[start:start + MEDIA_GROUP_LIMIT]
+                if len(group) == 1:
+                    # A trailing single photo cannot form a media group
+                    await self.application.bot.send_photo(
+                        chat_id=chat_id,
+                        photo=group[0].media,
+                        **kwargs
+                    )
+                else:
+                    await self.application.bot.send_media_group(
+                        chat_id=chat_id,
+                        media=group,
+                        **kwargs
+                    )
             
             return True
             
-        except Exception as e:
-            logger.error(f"Error sending photo: {str(e)}")
+        except (TelegramError, OSError) as e:
+            logger.error("Error sending photos: %s", e)
             return False
     
     def get_bot_info(self):
@@ -331,7 +390,7 @@ async def run_telegram_bot():
             logger.error("❌ TELEGRAM_TOKEN not found in environment variables")
             return
         
-        logger.info(f"📱 Using Telegram token: {settings.TELEGRAM_TOKEN[:10]}...")
+        logger.info("📱 Using Telegram token: %s...", settings.TELEGRAM_TOKEN[:10])
         
         # Start the bot
         await telegram_bot.start_polling()
@@ -339,7 +398,7 @@ async def run_telegram_bot():
     except KeyboardInterrupt:
         logger.info("👋 Bot stopped by user")
     except Exception as e:
-        logger.error(f"❌ Fatal error running bot: {str(e)}")
+        logger.error("❌ Fatal error running bot: %s", e)
         raise e
 
 if __name__ == "__main__":
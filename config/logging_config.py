@@ -1,20 +1,89 @@
+import atexit
+import gzip
 import logging
 import logging.handlers
 import os
+import queue
+import shutil
 from datetime import datetime
 from config.settings import settings
 
+# Loggers that get their own daily log file
+SERVICE_LOGGERS = frozenset({
+    'telegram_bot',
+    'ai_agent',
+    'calendar_service',
+    'email_service',
+    'speech_service',
+    'image_service',
+    'fastapi'
+})
+
+# Records are queued by the calling thread and written by a background listener
+_log_queue = queue.SimpleQueue()
+_queue_listener = None
+
+# Formatter shared by all file handlers
+detailed_formatter = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
+)
+
+def _gzip_namer(default_name: str) -> str:
+    """Name rotated log files with a .gz suffix"""
+    return default_name + '.gz'
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    """Compress the rotated log file and remove the original"""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+def _timed_file_handler(filename: str, level: int, backup_count: int = 7) -> logging.Handler:
+    """
+    Create a file handler that rolls over at midnight and gzips old files
+    
+    Args:
+        filename (str): Path of the log file
+        level (int): Minimum level written to the file
+        backup_count (int): Number of compressed days to keep
+        
+    Returns:
+        logging.Handler: Configured handler (file opened on first write)
+    """
+    handler = logging.handlers.TimedRotatingFileHandler(
+        filename,
+        when='midnight',
+        backupCount=backup_count,
+        delay=True
+    )
+    handler.namer = _gzip_namer
+    handler.rotator = _gzip_rotator
+    handler.setLevel(level)
+    handler.setFormatter(detailed_formatter)
+    return handler
+
+def _attach_service_handler(logger: logging.Logger, logger_name: str) -> None:
+    """Attach the per-service daily file handler to a logger"""
+    logger.setLevel(logging.INFO)
+    
+    # Create separate log file for each service (opened on first write)
+    service_log_file = os.path.join(settings.LOGS_DIR, f'{logger_name}.log')
+    service_handler = _timed_file_handler(service_log_file, logging.INFO)
+    
+    # Only write records from this logger (and its children) to the service file
+    service_handler.addFilter(logging.Filter(logger_name))
+    if _queue_listener:
+        _queue_listener.handlers = _queue_listener.handlers + (service_handler,)
+    logger._svc_handler = True
+
 def setup_logging():
     """Setup logging configuration for the application"""
+    global _queue_listener
     
     # Create logs directory if it doesn't exist
     os.makedirs(settings.LOGS_DIR, exist_ok=True)
     
     # Create formatters
-    detailed_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
-    )
-    
     simple_formatter = logging.Formatter(
         '%(asctime)s - %(levelname)s - %(message)s'
     )
@@ -27,65 +96,51 @@ def setup_logging():
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
     
+    if _queue_listener:
+        _queue_listener.stop()
+    
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(simple_formatter)
-    root_logger.addHandler(console_handler)
     
     # File handler for general logs
     general_log_file = os.path.join(settings.LOGS_DIR, 'telegram_agent.log')
-    file_handler = logging.handlers.RotatingFileHandler(
-        general_log_file,
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=5
-    )
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(detailed_formatter)
-    root_logger.addHandler(file_handler)
+    file_handler = _timed_file_handler(general_log_file, logging.INFO)
     
     # Error file handler
     error_log_file = os.path.join(settings.LOGS_DIR, 'errors.log')
-    error_handler = logging.handlers.RotatingFileHandler(
-        error_log_file,
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=5
+    error_handler = _timed_file_handler(error_log_file, logging.ERROR)
+    
+    # Log calls only enqueue the record; the listener thread does the I/O
+    _queue_listener = logging.handlers.QueueListener(
+        _log_queue,
+        console_handler,
+        file_handler,
+        error_handler,
+        respect_handler_level=True
     )
-    error_handler.setLevel(logging.ERROR)
-    error_handler.setFormatter(detailed_formatter)
-    root_logger.addHandler(error_handler)
+    _queue_listener.start()
+    root_logger.addHandler(logging.handlers.QueueHandler(_log_queue))
     
-    # Create specific loggers for different modules
-    loggers = [
-        'telegram_bot',
-        'ai_agent',
-        'calendar_service',
-        'email_service',
-        'speech_service',
-        'image_service',
-        'fastapi'
-    ]
-    
-    for logger_name in loggers:
-        logger = logging.getLogger(logger_name)
-        logger.setLevel(logging.INFO)
-        
-        # Create separate log file for each service
-        service_log_file = os.path.join(settings.LOGS_DIR, f'{logger_name}.log')
-        service_handler = logging.handlers.RotatingFileHandler(
-            service_log_file,
-            maxBytes=5*1024*1024,  # 5MB
-            backupCount=3
-        )
-        service_handler.setLevel(logging.INFO)
-        service_handler.setFormatter(detailed_formatter)
-        logger.addHandler(service_handler)
+    # Service-specific file handlers are attached lazily in get_logger()
     
     logging.info("✅ Logging configuration setup complete")
 
+def stop_logging():
+    """Flush queued log records and stop the background listener"""
+    global _queue_listener
+    if _queue_listener:
+        _queue_listener.stop()
+        _queue_listener = None
+
 def get_logger(name: str) -> logging.Logger:
     """Get a logger instance with the specified name"""
-    return logging.getLogger(name)
+    logger = logging.getLogger(name)
+    if name in SERVICE_LOGGERS and not getattr(logger, '_svc_handler', False):
+        _attach_service_handler(logger, name)
+    return logger
 
 # Setup logging when this module is imported
-setup_logging()
\ No newline at end of file
+setup_logging()
+atexit.register(stop_logging)
\ No newline at end of file
@@ -1,43 +1,71 @@
 import os
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+@dataclass(frozen=True, slots=True)
 class Settings:
     """Application settings and configuration"""
     
     # Telegram Configuration
-    TELEGRAM_TOKEN: str = os.getenv("TELEGRAM_TOKEN", "")
+    TELEGRAM_TOKEN: str = field(default_factory=lambda: os.getenv("TELEGRAM_TOKEN", ""))
     
     # Gemini API Configuration
-    GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
+    GEMINI_API_KEY: str = field(default_factory=lambda: os.getenv("GEMINI_API_KEY", ""))
     
     # Hugging Face Configuration
-    HUGGINGFACEHUB_API_TOKEN: str = os.getenv("HUGGINGFACEHUB_API_TOKEN", "")
+    HUGGINGFACEHUB_API_TOKEN: str = field(default_factory=lambda: os.getenv("HUGGINGFACEHUB_API_TOKEN", ""))
     
     # Google Cloud Configuration
-    GOOGLE_CLIENT_ID: str = os.getenv("GOOGLE_CLIENT_ID", "")
-    GOOGLE_CLIENT_SECRET: str = os.getenv("GOOGLE_CLIENT_SECRET", "")
-    GOOGLE_PROJECT_ID: str = os.getenv("GOOGLE_PROJECT_ID", "")
+    GOOGLE_CLIENT_ID: str = field(default_factory=lambda: os.getenv("GOOGLE_CLIENT_ID", ""))
+    GOOGLE_CLIENT_SECRET: str = field(default_factory=lambda: os.getenv("GOOGLE_CLIENT_SECRET", ""))
+    GOOGLE_PROJECT_ID: str = field(default_factory=lambda: os.getenv("GOOGLE_PROJECT_ID", ""))
     
     # FastAPI Configuration
-    FASTAPI_HOST: str = os.getenv("FASTAPI_HOST", "0.0.0.0")
-    FASTAPI_PORT: int = int(os.getenv("FASTAPI_PORT", "8000"))
+    FASTAPI_HOST: str = field(default_factory=lambda: os.getenv("FASTAPI_HOST", "0.0.0.0"))
+    FASTAPI_PORT: int = field(default_factory=lambda: int(os.getenv("FASTAPI_PORT", "8000")))
     
     # File Paths
-    TEMP_DIR: str = os.getenv("TEMP_DIR", "./temp")
-    LOGS_DIR: str = os.getenv("LOGS_DIR", "./logs")
-    CREDENTIALS_FILE: str = os.getenv("CREDENTIALS_FILE", "./credentials.json")
+    TEMP_DIR: str = field(default_factory=lambda: os.getenv("TEMP_DIR", "./temp"))
+    LOGS_DIR: str = field(default_factory=lambda: os.getenv("LOGS_DIR", "./logs"))
+    TTS_CACHE_DIR: str = field(default_factory=lambda: os.getenv("TTS_CACHE_DIR", "./tts_cache"))
+    # Cached speech unused for this long is swept, and the oldest files go once the directory exceeds the size cap
+    TTS_CACHE_MAX_AGE_HOURS: int = field(default_factory=lambda: int(os.getenv("TTS_CACHE_MAX_AGE_HOURS", "24")))
+    TTS_CACHE_MAX_MB: int = field(default_factory=lambda: int(os.getenv("TTS_CACHE_MAX_MB", "200")))
     
     # Audio Settings
-    AUDIO_SAMPLE_RATE: int = int(os.getenv("AUDIO_SAMPLE_RATE", "24000"))
-    AUDIO_CHANNELS: int = int(os.getenv("AUDIO_CHANNELS", "1"))
-    AUDIO_SAMPLE_WIDTH: int = int(os.getenv("AUDIO_SAMPLE_WIDTH", "2"))
+    AUDIO_SAMPLE_RATE: int = field(default_factory=lambda: int(os.getenv("AUDIO_SAMPLE_RATE", "24000")))
+    AUDIO_CHANNELS: int = field(default_factory=lambda: int(os.getenv("AUDIO_CHANNELS", "1")))
+    AUDIO_SAMPLE_WIDTH: int = field(default_factory=lambda: int(os.getenv("AUDIO_SAMPLE_WIDTH", "2")))
+    
+    # Conversation Context Settings
+    CONTEXT_CACHE_SIZE: int = field(default_factory=lambda: int(os.getenv("CONTEXT_CACHE_SIZE", "10000")))
+    CONTEXT_TTL_SECONDS: int = field(default_factory=lambda: int(os.getenv("CONTEXT_TTL_SECONDS", "3600")))
+    
+    # Start intent analysis on a partial transcript while STT finishes (may spend extra tokens)
+    ENABLE_STT_LLM_OVERLAP: bool = field(default_factory=lambda: os.getenv("ENABLE_STT_LLM_OVERLAP", "false").lower() == "true")
+    
+    # Gemini request limits (concurrent calls per process and retries on HTTP 429)
+    GEMINI_MAX_CONCURRENCY: int = field(default_factory=lambda: int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")))
+    GEMINI_MAX_RETRIES: int = field(default_factory=lambda: int(os.getenv("GEMINI_MAX_RETRIES", "3")))
+    
+    # LLM response cache persistence: "sqlite" (LLM_CACHE_DIR), "redis" (shared by workers) or "memory"
+    LLM_CACHE_BACKEND: str = field(default_factory=lambda: os.getenv("LLM_CACHE_BACKEND", "sqlite"))
+    LLM_CACHE_DIR: str = field(default_factory=lambda: os.getenv("LLM_CACHE_DIR", "./llm_cache"))
+    LLM_CACHE_REDIS_URL: str = field(default_factory=lambda: os.getenv("LLM_CACHE_REDIS_URL", "redis://localhost:6379/0"))
+    
+    # Semantic intent cache (needs the optional sentence-transformers package; empty model disables it)
+    SEMANTIC_CACHE_MODEL: str = field(default_factory=lambda: os.getenv("SEMANTIC_CACHE_MODEL", "all-MiniLM-L6-v2"))
+    SEMANTIC_CACHE_ONNX_FILE: str = field(default_factory=lambda: os.getenv("SEMANTIC_CACHE_ONNX_FILE", "onnx/model_quint8_avx2.onnx"))
+    SEMANTIC_CACHE_SIZE: int = field(default_factory=lambda: int(os.getenv("SEMANTIC_CACHE_SIZE", "1024")))
+    SEMANTIC_CACHE_THRESHOLD: float = field(default_factory=lambda: float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")))
     
     # TTS Voice Configuration
-    TTS_VOICE_NAME: str = os.getenv("TTS_VOICE_NAME", "Kore")
+    TTS_VOICE_NAME: str = field(default_factory=lambda: os.getenv("TTS_VOICE_NAME", "Kore"))
+    TTS_BATCH_WINDOW_MS: int = field(default_factory=lambda: int(os.getenv("TTS_BATCH_WINDOW_MS", "0")))
     
     # Model Names
     GEMINI_STT_MODEL: str = "gemini-2.5-pro" #gemini-2.0-flash-Lite
@@ -47,47 +75,51 @@ class Settings:
     IMAGE_EDIT_MODEL: str = "Qwen/Qwen-Image-Edit"
     
     # Google Scopes
-    GOOGLE_SCOPES = [
+    GOOGLE_SCOPES: Tuple[str, ...] = (
         'https://www.googleapis.com/auth/calendar',
         'https://www.googleapis.com/auth/gmail.readonly',
         'https://www.googleapis.com/auth/gmail.send',
         'https://www.googleapis.com/auth/gmail.modify'
-    ]
+    )
+    
+    # OAuth client configuration, built once from the client ID/secret (never written to disk)
+    google_client_config: dict = field(init=False, repr=False)
+    
+    def __post_init__(self) -> None:
+        """Precompute derived settings"""
+        # Frozen dataclass - derived fields are assigned through object.__setattr__
+        object.__setattr__(self, 'google_client_config', {
+            "installed": {
+                "client_id": self.GOOGLE_CLIENT_ID,
+                "client_secret": self.GOOGLE_CLIENT_SECRET,
+                "project_id": self.GOOGLE_PROJECT_ID,
+                "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+                "token_uri": "https://oauth2.googleapis.com/token",
+                "redirect_uris": ["urn:ietf:wg:oauth:2.0:oob", "http://localhost"]
+            }
+        })
     
-    @classmethod
-    def validate_settings(cls) -> bool:
+    def validate_settings(self) -> bool:
         """Validate that all required settings are present"""
-        required_settings = [
-            cls.TELEGRAM_TOKEN,
-            cls.GEMINI_API_KEY,
-            cls.HUGGINGFACEHUB_API_TOKEN,
-            cls.GOOGLE_CLIENT_ID,
-            cls.GOOGLE_CLIENT_SECRET,
-            cls.GOOGLE_PROJECT_ID
-        ]
+        required_settings = {
+            "TELEGRAM_TOKEN": self.TELEGRAM_TOKEN,
+            "GEMINI_API_KEY": self.GEMINI_API_KEY,
+            "HUGGINGFACEHUB_API_TOKEN": self.HUGGINGFACEHUB_API_TOKEN,
+            "GOOGLE_CLIENT_ID": self.GOOGLE_CLIENT_ID,
+            "GOOGLE_CLIENT_SECRET": self.GOOGLE_CLIENT_SECRET,
+            "GOOGLE_PROJECT_ID": self.GOOGLE_PROJECT_ID
+        }
         
-        missing_settings = []
-        for i, setting in enumerate(required_settings):
-            if not setting:
-                setting_names = [
-                    "TELEGRAM_TOKEN",
-                    "GEMINI_API_KEY", 
-                    "HUGGINGFACEHUB_API_TOKEN",
-                    "GOOGLE_CLIENT_ID",
-                    "GOOGLE_CLIENT_SECRET",
-                    "GOOGLE_PROJECT_ID"
-                ]
-                missing_settings.append(setting_names[i])
+        missing_settings = [name for name, value in required_settings.items() if not value]
         
         if missing_settings:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_settings)}")
         
         return True
     
-    @classmethod
-    def create_directories(cls) -> None:
+    def create_directories(self) -> None:
         """Create necessary directories if they don't exist"""
-        directories = [cls.TEMP_DIR, cls.LOGS_DIR]
+        directories = [self.TEMP_DIR, self.LOGS_DIR, self.TTS_CACHE_DIR, self.LLM_CACHE_DIR]
         for directory in directories:
             os.makedirs(directory, exist_ok=True)
 
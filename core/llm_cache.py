@@ -0,0 +1,386 @@
+import asyncio
+import copy
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Protocol
+import orjson
+from cachetools import LRUCache, TTLCache
+from config.logging_config import get_logger
+
+logger = get_logger('ai_agent')
+
+class CacheBackend(Protocol):
+    """Shared store behind the in-process LLM cache"""
+
+    async def get(self, key: str) -> Optional[str]: ...
+
+    async def set(self, key: str, value: str, ttl: Optional[float]) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+class SQLiteBackend:
+    """Cache backend persisting entries in a local SQLite file (single host)"""
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the cache database
+
+        Args:
+            path (str): SQLite database file
+        """
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+        logger.info("SQLite cache backend opened at %s", path)
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key: str, value: str, ttl: Optional[float]) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float]) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, key)
+
+class RedisBackend:
+    """Cache backend shared by several bot workers through Redis"""
+
+    KEY_PREFIX = "llm_cache:"
+
+    def __init__(self, url: str):
+        """
+        Connect to Redis
+
+        Args:
+            url (str): Redis connection URL
+        """
+        import redis.asyncio as redis
+        self._client = redis.from_url(url, decode_responses=True)
+        logger.info("Redis cache backend configured")
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client.get(self.KEY_PREFIX + key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float]) -> None:
+        await self._client.set(self.KEY_PREFIX + key, value, ex=int(ttl) if ttl else None)
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(self.KEY_PREFIX + key)
+
+def create_cache_backend(kind: str, directory: str, redis_url: str) -> Optional[CacheBackend]:
+    """
+    Create the configured cache backend
+
+    Args:
+        kind (str): "sqlite", "redis" or "memory"
+        directory (str): Directory for the SQLite database
+        redis_url (str): Redis connection URL
+
+    Returns:
+        Optional[CacheBackend]: Backend, or None to keep the cache in memory only
+    """
+    try:
+        if kind == "sqlite":
+            os.makedirs(directory, exist_ok=True)
+            return SQLiteBackend(os.path.join(directory, "responses.db"))
+        if kind == "redis":
+            return RedisBackend(redis_url)
+    except ImportError:
+        logger.warning("redis package not installed, LLM cache kept in memory")
+    except Exception as e:
+        logger.error("Failed to open LLM cache backend: %s", e)
+    return None
+
+class LLMCache:
+    """Exact-match cache for LLM response texts keyed by model and prompt"""
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        backend: Optional[CacheBackend] = None
+    ):
+        """
+        Initialize the LLM cache
+
+        Args:
+            maxsize (int): Maximum number of in-process responses (least recently used are evicted)
+            ttl (Optional[float]): Seconds a response stays valid, or None to keep until evicted
+            backend (Optional[CacheBackend]): Persistent store consulted on in-process misses
+        """
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl) if ttl else LRUCache(maxsize=maxsize)
+        self._ttl = ttl
+        self._backend = backend
+        self.stats = {"hits": 0, "misses": 0}
+        logger.info("LLMCache initialized")
+
+    @staticmethod
+    def make_key(model: str, contents: Any) -> str:
+        """
+        Build the cache key for a request
+
+        Args:
+            model (str): Model name
+            contents (Any): Prompt string or structured contents list
+
+        Returns:
+            str: SHA-256 hex digest of the model and prompt
+        """
+        if isinstance(contents, str):
+            prompt = contents.encode('utf-8')
+        else:
+            prompt = orjson.dumps(contents, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(model.encode('utf-8') + b"\0" + prompt).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached response text
+
+        Args:
+            key (str): Cache key from make_key()
+
+        Returns:
+            Optional[str]: Cached response text or None on miss
+        """
+        text = self._cache.get(key)
+        if text is None and self._backend is not None:
+            try:
+                text = await self._backend.get(key)
+            except Exception as e:
+                logger.warning("LLM cache backend read failed: %s", e)
+            if text is not None:
+                self._cache[key] = text
+        if text is None:
+            self.stats["misses"] += 1
+        else:
+            self.stats["hits"] += 1
+        return text
+
+    async def set(self, key: str, text: str) -> None:
+        """
+        Store a response text
+
+        Args:
+            key (str): Cache key from make_key()
+            text (str): Response text to cache
+        """
+        self._cache[key] = text
+        if self._backend is not None:
+            try:
+                await self._backend.set(key, text, self._ttl)
+            except Exception as e:
+                logger.warning("LLM cache backend write failed: %s", e)
+
+    def clear(self) -> None:
+        """Drop all in-process responses"""
+        self._cache.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and current size"""
+        return {**self.stats, "size": len(self._cache)}
+
+class SemanticCache:
+    """Similarity cache for parsed intent responses keyed by user input embeddings"""
+
+    def __init__(
+        self,
+        model_name: str,
+        threshold: float = 0.92,
+        maxsize: int = 1024,
+        onnx_file: Optional[str] = None
+    ):
+        """
+        Initialize the semantic cache
+
+        Args:
+            model_name (str): SentenceTransformer model used to embed user input
+            threshold (float): Minimum cosine similarity for a cache hit
+            maxsize (int): Maximum number of cached responses (oldest are overwritten)
+            onnx_file (Optional[str]): Quantized ONNX weights inside the model repo, or None for PyTorch
+        """
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.stats = {"hits": 0, "misses": 0}
+        self._model = None
+        self._embeddings = None
+        self._responses: List[Optional[Dict[str, Any]]] = [None] * maxsize
+        self._count = 0
+        self._next = 0
+
+        if not model_name:
+            logger.info("SemanticCache disabled")
+            return
+
+        try:
+            import numpy as np
+            self._model = self._load_model(model_name, onnx_file)
+            dimension = self._model.get_sentence_embedding_dimension()
+            self._embeddings = np.zeros((maxsize, dimension), dtype=np.float32)
+            logger.info("SemanticCache initialized with %s", model_name)
+        except ImportError:
+            logger.warning("sentence-transformers not installed, semantic cache disabled")
+        except Exception as e:
+            logger.error("Failed to load semantic cache model: %s", e)
+            self._model = None
+
+    @staticmethod
+    def _load_model(model_name: str, onnx_file: Optional[str]) -> Any:
+        """
+        Load the embedding model, preferring int8 ONNX Runtime inference
+
+        Args:
+            model_name (str): SentenceTransformer model name
+            onnx_file (Optional[str]): Quantized ONNX weights inside the model repo
+
+        Returns:
+            Any: Loaded SentenceTransformer
+        """
+        from sentence_transformers import SentenceTransformer
+
+        if onnx_file:
+            try:
+                return SentenceTransformer(
+                    model_name,
+                    backend="onnx",
+                    model_kwargs={"file_name": onnx_file, "provider": "CPUExecutionProvider"}
+                )
+            except Exception as e:
+                logger.warning("ONNX embedding backend unavailable, using PyTorch: %s", e)
+
+        return SentenceTransformer(model_name)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether an embedding model is loaded"""
+        return self._model is not None
+
+    async def embed(self, text: str) -> Optional[Any]:
+        """
+        Embed text off the event loop
+
+        Args:
+            text (str): Text to embed
+
+        Returns:
+            Optional[np.ndarray]: Normalized embedding or None if disabled
+        """
+        if not self.enabled:
+            return None
+        try:
+            embeddings = await asyncio.to_thread(self._model.encode, [text], normalize_embeddings=True)
+            return embeddings[0]
+        except Exception as e:
+            logger.error("Error embedding text for semantic cache: %s", e)
+            return None
+
+    def lookup(self, embedding: Any) -> Optional[Dict[str, Any]]:
+        """
+        Find the cached response closest to an embedding
+
+        The store is a bounded ring buffer, so an exact scan stays in the
+        tens of microseconds and needs no approximate index that would
+        have to support eviction.
+
+        Args:
+            embedding (np.ndarray): Normalized embedding from embed()
+
+        Returns:
+            Optional[Dict[str, Any]]: Copy of the cached response or None on miss
+        """
+        if self._count:
+            scores = self._embeddings[:self._count] @ embedding
+            best = int(scores.argmax())
+            if scores[best] >= self.threshold:
+                self.stats["hits"] += 1
+                return copy.deepcopy(self._responses[best])
+        self.stats["misses"] += 1
+        return None
+
+    def add(self, embedding: Any, response: Dict[str, Any]) -> None:
+        """
+        Store a parsed response under its input embedding
+
+        Args:
+            embedding (np.ndarray): Normalized embedding from embed()
+            response (Dict[str, Any]): Parsed response to cache
+        """
+        self._embeddings[self._next] = embedding
+        self._responses[self._next] = copy.deepcopy(response)
+        self._next = (self._next + 1) % self.maxsize
+        self._count = min(self._count + 1, self.maxsize)
+
+    def save(self, path: str) -> None:
+        """
+        Write the cached embeddings and responses to disk, oldest first
+
+        Args:
+            path (str): Snapshot file (.npz)
+        """
+        if not self.enabled or not self._count:
+            return
+        try:
+            import numpy as np
+            start = self._next if self._count == self.maxsize else 0
+            order = [(start + i) % self.maxsize for i in range(self._count)]
+            np.savez(
+                path,
+                embeddings=self._embeddings[order],
+                responses=np.frombuffer(orjson.dumps([self._responses[i] for i in order]), dtype=np.uint8)
+            )
+            logger.info("Saved %d semantic cache entries", self._count)
+        except Exception as e:
+            logger.error("Failed to save semantic cache: %s", e)
+
+    def load(self, path: str) -> None:
+        """
+        Restore entries written by save()
+
+        Args:
+            path (str): Snapshot file (.npz)
+        """
+        if not self.enabled or not os.path.exists(path):
+            return
+        try:
+            import numpy as np
+            with np.load(path) as snapshot:
+                embeddings = snapshot["embeddings"]
+                responses = orjson.loads(snapshot["responses"].tobytes())
+            if embeddings.shape[1] != self._embeddings.shape[1]:
+                logger.warning("Semantic cache snapshot was built with another model, ignoring it")
+                return
+            for embedding, response in zip(embeddings[-self.maxsize:], responses[-self.maxsize:]):
+                self.add(embedding, response)
+            logger.info("Loaded %d semantic cache entries", self._count)
+        except Exception as e:
+            logger.error("Failed to load semantic cache: %s", e)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and current size"""
+        return {**self.stats, "size": self._count}
@@ -1,31 +1,152 @@
+import asyncio
+import functools
 import os
+import random
 import re
-from typing import Optional, Dict, Any, List
+import httpx
+import orjson
+from typing import Optional, Dict, Any, Awaitable, Callable, Final, List, Sequence, Tuple, TypeVar
 from google import genai
+from google.genai import errors, types
+from pydantic import BaseModel, ValidationError
 from config.settings import settings
+from core.llm_cache import LLMCache, SemanticCache, create_cache_backend
 from config.logging_config import get_logger
 
 logger = get_logger('ai_agent')
 
-class LLMHandler:
-    """Handler for Gemini LLM interactions"""
-    
-    def __init__(self):
-        """Initialize the LLM handler"""
-        self.client = genai.Client(api_key=settings.GEMINI_API_KEY)
-        self.model = settings.GEMINI_LLM_MODEL
-        self.system_prompt = self._get_system_prompt()
-        logger.info("LLMHandler initialized")
-    
-    def _get_system_prompt(self) -> str:
-        """Get the system prompt for the AI agent"""
-        return """You are an AI assistant that helps with calendar management, email management, and image creation/editing. Your job is to extract information from user requests and respond intelligently.
+T = TypeVar("T")
+
+# Exact-match LLM response cache bounds
+LLM_CACHE_MAX_ENTRIES = 1024
+LLM_CACHE_TTL = 3600
+
+# Gemini HTTP transport: request timeout (ms) and the pooled keep-alive connections
+GEMINI_TIMEOUT_MS = 30_000
+GEMINI_CONNECTION_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+
+# Output token caps for deterministic (temperature 0) calls; thinking is disabled
+# on these so the whole budget goes to the answer
+INTENT_MAX_OUTPUT_TOKENS = 1024
+EMAIL_MAX_OUTPUT_TOKENS = 1024
+CONFIRMATION_MAX_OUTPUT_TOKENS = 256
+
+# Base delay (seconds) for exponential backoff on rate-limited Gemini calls
+RATE_LIMIT_BACKOFF_BASE = 1.0
+
+# Email address anywhere in user input
+EMAIL_ADDRESS_REGEX = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+EMAIL_ADDRESS_PATTERN = re.compile(f'({EMAIL_ADDRESS_REGEX})')
+
+def _compile_keywords(*keywords: str) -> re.Pattern:
+    """Compile keywords into one alternation that matches any of them as a substring"""
+    return re.compile("|".join(map(re.escape, keywords)))
+
+# Keyword groups for intent detection, searched in one pass over lowercased input
+IMAGE_CREATE_KEYWORDS = _compile_keywords('create', 'generate', 'make', 'draw', 'paint', 'design', 'produce')
+IMAGE_NOUN_KEYWORDS = _compile_keywords('image', 'picture', 'photo', 'artwork', 'drawing', 'painting', 'illustration')
+EMAIL_SEND_KEYWORDS = _compile_keywords('send', 'email', 'mail', 'message', 'write to', 'contact')
+EMAIL_READ_KEYWORDS = _compile_keywords('email', 'inbox', 'unread', 'messages', 'mail')
+EMAIL_ACTION_KEYWORDS = _compile_keywords('show', 'check', 'get', 'read', 'list', 'came', 'received')
+CALENDAR_CREATE_KEYWORDS = _compile_keywords('create', 'add', 'schedule', 'meeting', 'event', 'appointment')
+
+# Regex fast path for image creation requests (matched against lowercased input)
+IMAGE_REQUEST_PATTERNS = (
+    re.compile(r'(?:create|generate|make|draw)\s+(?:an?\s+)?(?:image|picture|photo|artwork|drawing|painting|illustration)'),
+    re.compile(r'(?:i\s+want\s+to\s+)?(?:create|generate|make|draw)\s+(?:a\s+)?(?:image|picture|photo)'),
+    re.compile(r'(?:text\s+to\s+image|image\s+generation|ai\s+art)'),
+)
+# Style keywords in priority order: when several styles are mentioned the earliest entry wins
+IMAGE_STYLE_KEYWORDS = {
+    'cartoon': r'cartoon|anime|animated',
+    'realistic': r'realistic|photographic|photo',
+    'digital art': r'digital\s+art|digital',
+    'oil painting': r'oil\s+painting|painting',
+    'watercolor': r'watercolor|water\s+color',
+    'sketch': r'sketch|pencil|drawing',
+    'abstract': r'abstract',
+    'vintage': r'vintage|retro|old',
+    'modern': r'modern|contemporary',
+}
+IMAGE_STYLE_NAMES = tuple(IMAGE_STYLE_KEYWORDS)
+# One group per style inside a lookahead, so a single scan reports every
+# position where any style keyword starts (overlapping keywords included)
+IMAGE_STYLE_PATTERN = re.compile(
+    "(?=" + "|".join(f"({keywords})" for keywords in IMAGE_STYLE_KEYWORDS.values()) + ")"
+)
+IMAGE_COUNT_PATTERN = re.compile(r'(\d+)\s+images?')
+IMAGE_SIZE_PATTERNS = (
+    re.compile(r'(\d+x\d+)'),
+    re.compile(r'(\d+\s*[x×]\s*\d+)'),
+)
+IMAGE_PROMPT_PREFIX_PATTERNS = (
+    re.compile(r'^(?:i\s+want\s+to\s+)?(?:create|generate|make|draw|paint|design|produce)\s+(?:an?\s+)?(?:image|picture|photo|artwork|drawing|painting|illustration)\s+(?:of\s+)?', re.I),
+    re.compile(r'^(?:create|generate|make|draw|paint|design|produce)\s+(?:an?\s+)?(?:image|picture|photo|artwork|drawing|painting|illustration)\s+(?:of\s+)?', re.I),
+    re.compile(r'^(?:i\s+want\s+to\s+)?(?:create|generate|make|draw)\s+(?:a\s+)?(?:image|picture|photo)\s+', re.I),
+    re.compile(r'^(?:can\s+you\s+)?(?:create|generate|make|draw)\s+', re.I),
+)
+# Modifiers stripped from an image prompt, applied in order: each removal can
+# expose the next (e.g. "4 1024x1024 images" only becomes a count once the size is gone)
+IMAGE_PROMPT_MODIFIER_PATTERNS = (
+    re.compile(r'\s+in\s+(?:cartoon|realistic|digital\s+art|oil\s+painting|watercolor|sketch|abstract|vintage|modern)\s+style', re.I),
+    re.compile(r'\s+style\s*$', re.I),
+    re.compile(r'\s+(?:\d+x\d+|\d+\s*[x×]\s*\d+)', re.I),
+    re.compile(r'\s+(?:high|low|medium)\s+quality', re.I),
+    re.compile(r'\s+\d+\s+images?', re.I),
+)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+LEADING_ARTICLE_PATTERN = re.compile(r'^(?:a\s+|an\s+|the\s+)', re.I)
+
+# Regex fast path for email sending requests
+EMAIL_SUBJECT_PATTERNS = (
+    re.compile(r'with\s+subject\s+["\']?([^"\']+)["\']?', re.I),
+    re.compile(r'subject:\s*["\']?([^"\']+)["\']?', re.I),
+    re.compile(r'subject\s+["\']?([^"\']+)["\']?', re.I),
+)
+# Shared by the regex fast path and the offline fallback parser; add new
+# phrasings here and both pick them up
+EMAIL_MESSAGE_PATTERNS = (
+    re.compile(r'say\s+to\s+(?:him|her|them)\s+(.+?)(?:\s+(?:with|and)|$)', re.I),
+    re.compile(r'say\s+(.+?)(?:\s+(?:with|and)|$)', re.I),
+    re.compile(r'message\s+["\']?([^"\']+)["\']?', re.I),
+    re.compile(r'tell\s+(?:him|her|them)\s+(.+?)(?:\s+(?:with|and)|$)', re.I),
+    re.compile(r'write\s+(.+?)(?:\s+(?:with|and)|$)', re.I),
+)
+EMAIL_RECIPIENT_SUFFIX_PATTERN = re.compile(f'\\s+to\\s+({EMAIL_ADDRESS_REGEX}).*$', re.I)
+EMAIL_AFTER_RECIPIENT_PATTERN = re.compile(f'email\\s+to\\s+({EMAIL_ADDRESS_REGEX})\\s+(.+?)$', re.I)
+EMAIL_LEADING_VERB_PATTERN = re.compile(r'^(?:say\s+to\s+(?:him|her|them)\s+|tell\s+(?:him|her|them)\s+|say\s+|tell\s+|with\s+)', re.I)
+
+# Time and date hints for the offline fallback parser
+TIME_PATTERNS = (
+    re.compile(r'(\d{1,2}:\d{2}\s*(?:am|pm))', re.I),
+    re.compile(r'(\d{1,2}\s*(?:am|pm))', re.I),
+    re.compile(r'(\d{1,2}:\d{2})', re.I),
+)
+DATE_PATTERNS = (
+    re.compile(r'(tomorrow)', re.I),
+    re.compile(r'(today)', re.I),
+    re.compile(r'(next\s+\w+)', re.I),
+    re.compile(r'(\w+day)', re.I),
+)
+
+# Calendar confirmations rendered locally; anything they can't fill falls back to the LLM
+CALENDAR_RESPONSE_TEMPLATES = {
+    "created": "✅ Event '{title}' scheduled for {date} at {time}{duration_suffix}{attendees_suffix}.",
+    "updated": "✅ Event '{title}' updated to {date} at {time}{duration_suffix}{attendees_suffix}.",
+    "deleted": "🗑️ Event '{title}' on {date} has been deleted.",
+}
+
+# Intents handled by a service; anything else is answered as conversation
+ACTION_INTENT_PREFIXES = ("calendar_", "email_", "image_")
+
+# Static prompts (sent as the Gemini system instruction, never rebuilt per request)
+SYSTEM_PROMPT: Final[str] = """You are an AI assistant that helps with calendar management, email management, and image creation/editing. Your job is to extract information from user requests and respond intelligently.
 
 **CRITICAL RULES:**
 1. ALWAYS extract as much information as possible from the user's message
 2. NEVER ask for information that's already provided
 3. Use smart defaults for missing information
-4. Provide structured JSON responses for processing
+4. Always respond by calling exactly one function
 
 **Smart Defaults:**
 - Event Duration: 1 hour for meetings/interviews, 30 minutes for calls
@@ -84,18 +205,7 @@ For email retrieval requests, extract:
 - time_filter: Time-based filters like "today", "this week", "yesterday"
 
 **Response Format:**
-Always respond with valid JSON in this exact format:
-{
-    "intent": "intent_type",
-    "confidence": 0.95,
-    "parameters": {
-        "extracted_parameters": "here"
-    },
-    "response_text": "Your conversational response",
-    "requires_clarification": false,
-    "clarification_questions": [],
-    "suggested_actions": []
-}
+Always respond by calling exactly one function: the one named after the detected intent, with the extracted parameters as arguments. For general_chat, put your conversational reply in response_text and list any questions you need answered in clarification_questions.
 
 **Parameter Extraction Examples:**
 
@@ -166,152 +276,496 @@ Parameters: {
     "time_filter": "today"
 }"""
 
+INTENT_PROMPT: Final[str] = SYSTEM_PROMPT + """
+
+Analyze the user's input, extract all possible information and call the matching function.
+
+Examples:
+Input: "create an image of a boy flying in the sky"
+Call: image_create(prompt="a boy flying in the sky", style="realistic", size="1024x1024", quality="high", num_images=1)
+
+Input: "I want to create a Image boy flying the sky"
+Call: image_create(prompt="boy flying the sky", style="realistic", size="1024x1024", quality="high", num_images=1)
+
+Input: "send email to john@example.com with subject hello and message this is a test"
+Call: email_send(to_email="john@example.com", subject="hello", body="this is a test", message_content="this is a test")
+
+Input: "how are you?"
+Call: general_chat(response_text="I'm doing great, thanks for asking! How can I help you today?")
+"""
+
+# Final user message of an intent-analysis request
+ANALYSIS_PROMPT_TEMPLATE: Final[str] = '{context}Now analyze: "{user_input}"'
+
+# Static instructions for the email and calendar confirmation calls; only the
+# per-request details go in the contents so the instruction prefix stays cacheable
+EMAIL_SYSTEM_PROMPT: Final[str] = """Create a professional email from the details given.
+
+Guidelines:
+- Use professional tone
+- Include proper greeting and closing
+- Be clear and concise
+- Include all relevant information from the additional details
+- Format for easy reading
+"""
+
+CALENDAR_CONFIRMATION_PROMPT: Final[str] = """Create a friendly confirmation message for a calendar action.
+
+Create a conversational response that:
+- Confirms the action was completed
+- Summarizes the key event details
+- Offers helpful next steps or suggestions
+- Maintains a helpful, professional tone
+
+Keep it concise but informative.
+"""
+
+class IntentParameters(BaseModel):
+    """Parameters the intent analysis may extract (unused ones stay null)"""
+    # Calendar
+    title: Optional[str] = None
+    date: Optional[str] = None
+    time: Optional[str] = None
+    duration: Optional[str] = None
+    location: Optional[str] = None
+    description: Optional[str] = None
+    attendees: Optional[List[str]] = None
+    # Email send
+    to_email: Optional[str] = None
+    subject: Optional[str] = None
+    body: Optional[str] = None
+    message_content: Optional[str] = None
+    purpose: Optional[str] = None
+    # Email get
+    query: Optional[str] = None
+    max_results: Optional[int] = None
+    include_body: Optional[bool] = None
+    time_filter: Optional[str] = None
+    # Image create/edit
+    prompt: Optional[str] = None
+    style: Optional[str] = None
+    size: Optional[str] = None
+    quality: Optional[str] = None
+    negative_prompt: Optional[str] = None
+    num_images: Optional[int] = None
+    aspect_ratio: Optional[str] = None
+    source_image: Optional[str] = None
+    edit_prompt: Optional[str] = None
+    mask_prompt: Optional[str] = None
+    strength: Optional[float] = None
+
+# Argument types for the intent functions (names match IntentParameters)
+PARAMETER_SCHEMAS = {
+    name: types.Schema(type=schema_type)
+    for schema_type, names in (
+        (types.Type.STRING, (
+            "title", "date", "time", "duration", "location", "description",
+            "to_email", "subject", "body", "message_content", "purpose",
+            "query", "time_filter",
+            "prompt", "style", "size", "quality", "negative_prompt", "aspect_ratio",
+            "source_image", "edit_prompt", "mask_prompt",
+            "response_text"
+        )),
+        (types.Type.INTEGER, ("max_results", "num_images")),
+        (types.Type.BOOLEAN, ("include_body",)),
+        (types.Type.NUMBER, ("strength",)),
+    )
+    for name in names
+}
+PARAMETER_SCHEMAS["attendees"] = types.Schema(type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING))
+PARAMETER_SCHEMAS["clarification_questions"] = PARAMETER_SCHEMAS["attendees"]
+
+# One function per intent: (description, argument names)
+INTENT_FUNCTIONS = {
+    "calendar_create": ("Create events, meetings, appointments", ("title", "date", "time", "duration", "location", "description", "attendees")),
+    "calendar_get": ("Check the schedule or view events", ("date",)),
+    "calendar_update": ("Modify an existing event", ("title", "date", "time", "duration", "location", "description", "attendees")),
+    "calendar_delete": ("Remove an event", ("title", "date", "time")),
+    "email_send": ("Send emails, reminders, messages", ("to_email", "subject", "body", "message_content", "purpose")),
+    "email_get": ("Retrieve, check or read emails", ("query", "max_results", "include_body", "time_filter")),
+    "image_create": ("Create a new image from a text description", ("prompt", "style", "size", "quality", "negative_prompt", "num_images", "aspect_ratio")),
+    "image_edit": ("Edit an existing image with a text prompt", ("source_image", "edit_prompt", "mask_prompt", "style", "strength")),
+    "image_generate": ("General image generation requests", ("prompt", "style", "size", "quality", "negative_prompt", "num_images", "aspect_ratio")),
+    "general_chat": ("Everything else; reply conversationally", ("response_text", "clarification_questions")),
+}
+
+INTENT_TOOL = types.Tool(function_declarations=[
+    types.FunctionDeclaration(
+        name=name,
+        description=description,
+        parameters=types.Schema(
+            type=types.Type.OBJECT,
+            properties={arg: PARAMETER_SCHEMAS[arg] for arg in args}
+        )
+    )
+    for name, (description, args) in INTENT_FUNCTIONS.items()
+])
+
+class EmailContent(BaseModel):
+    """Structured output schema for generated emails"""
+    subject: str
+    body: str
+
+class LLMHandler:
+    """Handler for Gemini LLM interactions"""
+    
+    def __init__(self):
+        """Initialize the LLM handler"""
+        # One pooled HTTP/2 client carries every async call, so TLS setup is paid once
+        self.client = genai.Client(
+            api_key=settings.GEMINI_API_KEY,
+            http_options=types.HttpOptions(
+                timeout=GEMINI_TIMEOUT_MS,
+                async_client_args={"http2": True, "limits": GEMINI_CONNECTION_LIMITS}
+            )
+        )
+        self.model = settings.GEMINI_LLM_MODEL
+        no_thinking = types.ThinkingConfig(thinking_budget=0)
+        self.intent_config = types.GenerateContentConfig(
+            system_instruction=INTENT_PROMPT,
+            tools=[INTENT_TOOL],
+            tool_config=types.ToolConfig(
+                function_calling_config=types.FunctionCallingConfig(mode="ANY")
+            ),
+            temperature=0,
+            max_output_tokens=INTENT_MAX_OUTPUT_TOKENS,
+            thinking_config=no_thinking
+        )
+        self.email_config = types.GenerateContentConfig(
+            system_instruction=EMAIL_SYSTEM_PROMPT,
+            response_mime_type="application/json",
+            response_schema=EmailContent,
+            temperature=0,
+            max_output_tokens=EMAIL_MAX_OUTPUT_TOKENS,
+            thinking_config=no_thinking
+        )
+        self.confirmation_config = types.GenerateContentConfig(
+            system_instruction=CALENDAR_CONFIRMATION_PROMPT,
+            temperature=0,
+            max_output_tokens=CONFIRMATION_MAX_OUTPUT_TOKENS,
+            thinking_config=no_thinking
+        )
+        # The configs above are reused for every call, so their cache-key
+        # fingerprints (which include the full tool schema) are rendered once
+        self._config_fingerprints = {
+            id(config): repr(config)
+            for config in (self.intent_config, self.email_config, self.confirmation_config)
+        }
+        self.response_cache = LLMCache(
+            maxsize=LLM_CACHE_MAX_ENTRIES,
+            ttl=LLM_CACHE_TTL,
+            backend=create_cache_backend(settings.LLM_CACHE_BACKEND, settings.LLM_CACHE_DIR, settings.LLM_CACHE_REDIS_URL)
+        )
+        self._gemini_semaphore = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.semantic_cache = SemanticCache(
+            settings.SEMANTIC_CACHE_MODEL,
+            settings.SEMANTIC_CACHE_THRESHOLD,
+            maxsize=settings.SEMANTIC_CACHE_SIZE,
+            onnx_file=settings.SEMANTIC_CACHE_ONNX_FILE
+        )
+        self._semantic_snapshot = os.path.join(settings.LLM_CACHE_DIR, "semantic_cache.npz")
+        self.semantic_cache.load(self._semantic_snapshot)
+        logger.info("LLMHandler initialized")
+    
+    def save_caches(self) -> None:
+        """Persist the semantic cache so a restart starts warm (the exact cache is written through)"""
+        self.semantic_cache.save(self._semantic_snapshot)
+    
+    def _config_fingerprint(self, config: types.GenerateContentConfig) -> str:
+        """
+        Get the cache-key fragment identifying a generation config
+        
+        Args:
+            config (types.GenerateContentConfig): Generation config
+            
+        Returns:
+            str: Precomputed repr for the handler's own configs, rendered on demand for others
+        """
+        return self._config_fingerprints.get(id(config)) or repr(config)
+    
+    def _build_intent_contents(
+        self,
+        user_input: str,
+        history_messages: Optional[Sequence[Dict[str, str]]] = None,
+        ephemeral_context: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Build the request contents for intent analysis
+        
+        The static prompt is sent separately as the system instruction and
+        earlier turns follow in order, so only the final message changes
+        between requests and the provider's prompt cache keeps matching the prefix.
+        
+        Args:
+            user_input (str): The user's input text
+            history_messages (Optional[Sequence[Dict[str, str]]]): Earlier turns as role/content dicts
+            ephemeral_context (Optional[List[str]]): Per-turn context lines for the final message
+            
+        Returns:
+            List[Dict[str, Any]]: Gemini contents list
+        """
+        contents = []
+        
+        for message in history_messages or []:
+            role = "model" if message.get("role") == "assistant" else "user"
+            contents.append({"role": role, "parts": [{"text": message.get("content", "")}]})
+        
+        context_lines = "\n".join(ephemeral_context or [])
+        if context_lines:
+            context_lines += "\n\n"
+        contents.append({
+            "role": "user",
+            "parts": [{"text": ANALYSIS_PROMPT_TEMPLATE.format_map(
+                {"context": context_lines, "user_input": user_input}
+            )}]
+        })
+        return contents
+    
+    async def _call_with_backoff(self, request: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run a Gemini request under the concurrency limit, retrying when rate limited
+        
+        Args:
+            request (Callable[[], Awaitable[T]]): Starts a fresh request on each attempt
+            
+        Returns:
+            T: The request's result
+        """
+        for attempt in range(settings.GEMINI_MAX_RETRIES + 1):
+            try:
+                async with self._gemini_semaphore:
+                    return await request()
+            except errors.APIError as e:
+                if e.code != 429 or attempt == settings.GEMINI_MAX_RETRIES:
+                    raise
+                delay = RATE_LIMIT_BACKOFF_BASE * (2 ** attempt) + random.uniform(0, RATE_LIMIT_BACKOFF_BASE)
+                logger.warning("Gemini rate limited, retrying in %.1fs", delay)
+                await asyncio.sleep(delay)
+    
+    async def _coalesced(self, key: str, request: Callable[[], Awaitable[T]]) -> T:
+        """
+        Share one in-flight request between concurrent callers with the same cache key
+        
+        A burst of identical messages would otherwise all miss the cache and
+        each pay for a Gemini call before the first result is stored.
+        
+        Args:
+            key (str): Cache key identifying the request
+            request (Callable[[], Awaitable[T]]): Starts the request if none is in flight
+            
+        Returns:
+            T: The shared request's result
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(request())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one caller cancelling doesn't cancel the others' request
+        return await asyncio.shield(task)
+    
+    async def _generate_with_backoff(
+        self,
+        contents: Any,
+        config: Optional[types.GenerateContentConfig] = None
+    ) -> types.GenerateContentResponse:
+        """
+        Call Gemini without blocking the event loop, retrying when rate limited
+        
+        Args:
+            contents (Any): Prompt string or structured contents list
+            config (Optional[types.GenerateContentConfig]): Generation config
+            
+        Returns:
+            types.GenerateContentResponse: The model response
+        """
+        return await self._call_with_backoff(lambda: self.client.aio.models.generate_content(
+            model=self.model,
+            contents=contents,
+            config=config
+        ))
+    
+    async def _stream_intent_call(
+        self,
+        contents: List[Dict[str, Any]]
+    ) -> Tuple[Optional[List[types.FunctionCall]], str]:
+        """
+        Stream intent analysis and return as soon as a function call arrives
+        
+        Function calls come back as complete parts, so the caller can
+        dispatch without waiting for the rest of the response to finish.
+        
+        Args:
+            contents (List[Dict[str, Any]]): Intent-analysis contents
+            
+        Returns:
+            Tuple[Optional[List[types.FunctionCall]], str]: Function calls (or None) and any plain text
+        """
+        async def request():
+            text_parts = []
+            stream = await self.client.aio.models.generate_content_stream(
+                model=self.model,
+                contents=contents,
+                config=self.intent_config
+            )
+            try:
+                async for chunk in stream:
+                    if chunk.function_calls:
+                        return chunk.function_calls, ""
+                    if chunk.text:
+                        text_parts.append(chunk.text)
+            finally:
+                await stream.aclose()
+            return None, "".join(text_parts)
+        
+        return await self._call_with_backoff(request)
+    
+    async def _cached_generate(
+        self,
+        contents: Any,
+        config: Optional[types.GenerateContentConfig] = None,
+        use_cache: bool = True
+    ) -> Optional[str]:
+        """
+        Generate content, serving repeated identical requests from the cache
+        
+        Only deterministic (temperature 0) calls are cached; sampled output
+        would otherwise be pinned to whatever the first call produced.
+        
+        Args:
+            contents (Any): Prompt string or structured contents list
+            config (Optional[types.GenerateContentConfig]): Generation config such as the system instruction
+            use_cache (bool): Whether this request may be served from / stored in the cache
+            
+        Returns:
+            Optional[str]: Response text or None if the model returned nothing
+        """
+        key = None
+        if use_cache and config is not None and config.temperature == 0:
+            key = self.response_cache.make_key(self.model, [self._config_fingerprint(config), contents])
+            cached_text = await self.response_cache.get(key)
+            if cached_text is not None:
+                logger.info("LLM response served from cache")
+                return cached_text
+        
+        if key:
+            response = await self._coalesced(key, lambda: self._generate_with_backoff(contents, config))
+        else:
+            response = await self._generate_with_backoff(contents, config)
+        
+        if not response or not response.text:
+            return None
+        
+        if key:
+            await self.response_cache.set(key, response.text)
+        return response.text
+    
     async def process_user_input(
         self, 
         user_input: str, 
-        context: Optional[Dict[str, Any]] = None
+        history_messages: Optional[Sequence[Dict[str, str]]] = None,
+        ephemeral_context: Optional[List[str]] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Process user input and determine the appropriate action
         
         Args:
             user_input (str): The user's input text
-            context (Optional[Dict[str, Any]]): Additional context information
+            history_messages (Optional[Sequence[Dict[str, str]]]): Earlier turns as role/content dicts
+            ephemeral_context (Optional[List[str]]): Per-turn context such as the previous intent
             
         Returns:
             Optional[Dict[str, Any]]: Processed response with action type and details
         """
         try:
-            logger.info(f"Processing user input: {user_input[:100]}...")
+            logger.info("Processing user input: %.100s...", user_input)
+            
+            # Lowercased once and shared by the keyword checks below
+            user_lower = user_input.lower()
             
             # First try regex-based extraction for common patterns (faster and more reliable)
-            email_result = self._extract_email_intent(user_input)
+            email_result = self._extract_email_intent(user_input, user_lower)
             if email_result:
                 logger.info("Email intent detected via regex")
                 return email_result
             
             # Check for image-related keywords
-            image_result = self._extract_image_intent(user_input)
+            image_result = self._extract_image_intent(user_input, user_lower)
             if image_result:
                 logger.info("Image intent detected via regex")
                 return image_result
             
-            # Create a focused prompt for intent recognition
-            analysis_prompt = f"""
-{self.system_prompt}
-
-User Input: "{user_input}"
-
-Analyze this input and extract all possible information. Respond with JSON only (no extra text):
-
-Examples:
-Input: "create an image of a boy flying in the sky"
-Output: {{
-    "intent": "image_create",
-    "confidence": 0.95,
-    "parameters": {{
-        "prompt": "a boy flying in the sky",
-        "style": "realistic",
-        "size": "1024x1024",
-        "quality": "high",
-        "num_images": 1
-    }},
-    "response_text": "I'll create an image of a boy flying in the sky for you.",
-    "requires_clarification": false,
-    "clarification_questions": [],
-    "suggested_actions": ["create_image"]
-}}
-
-Input: "I want to create a Image boy flying the sky"
-Output: {{
-    "intent": "image_create",
-    "confidence": 0.95,
-    "parameters": {{
-        "prompt": "boy flying the sky",
-        "style": "realistic",
-        "size": "1024x1024",
-        "quality": "high",
-        "num_images": 1
-    }},
-    "response_text": "I'll create an image of a boy flying in the sky for you.",
-    "requires_clarification": false,
-    "clarification_questions": [],
-    "suggested_actions": ["create_image"]
-}}
-
-Input: "send email to john@example.com with subject hello and message this is a test"
-Output: {{
-    "intent": "email_send",
-    "confidence": 0.95,
-    "parameters": {{
-        "to_email": "john@example.com",
-        "subject": "hello",
-        "body": "this is a test",
-        "message_content": "this is a test"
-    }},
-    "response_text": "I'll send an email to john@example.com with subject 'hello' and your message.",
-    "requires_clarification": false,
-    "clarification_questions": [],
-    "suggested_actions": ["send_email"]
-}}
-
-Now analyze: "{user_input}"
-"""
-
-            # Send to Gemini for processing
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=analysis_prompt
+            # Paraphrases of a standalone chat message reuse the earlier analysis
+            embedding = None
+            if not history_messages and not ephemeral_context:
+                embedding = await self.semantic_cache.embed(user_input)
+                if embedding is not None:
+                    cached_response = self.semantic_cache.lookup(embedding)
+                    if cached_response:
+                        logger.info("Intent analysis served from semantic cache")
+                        return cached_response
+            
+            contents = self._build_intent_contents(user_input, history_messages, ephemeral_context)
+            
+            # History is user-specific, so only first-turn requests use the shared cache.
+            # The key ignores spacing differences; case is kept because action
+            # parameters (names, titles, message bodies) echo the user's casing
+            cache_key = None
+            if not history_messages:
+                normalized_input = WHITESPACE_PATTERN.sub(' ', user_input).strip()
+                key_contents = self._build_intent_contents(normalized_input, None, ephemeral_context)
+                cache_key = self.response_cache.make_key(self.model, [self._config_fingerprint(self.intent_config), key_contents])
+                cached_json = await self.response_cache.get(cache_key)
+                if cached_json is not None:
+                    logger.info("Intent analysis served from cache")
+                    return orjson.loads(cached_json)
+            
+            # Send to Gemini, which answers with a single function call. Identical
+            # requests already in flight share it; with history the key covers the full contents
+            inflight_key = cache_key or self.response_cache.make_key(
+                self.model, [self._config_fingerprint(self.intent_config), contents]
             )
+            function_calls, response_text = await self._coalesced(
+                inflight_key, lambda: self._stream_intent_call(contents)
+            )
+            parsed_response = self._parse_function_call(function_calls, response_text)
+            if not parsed_response:
+                return self._create_fallback_response(user_input, user_lower)
             
-            if not response or not response.text:
-                logger.error("Empty response from LLM")
-                return self._create_fallback_response(user_input)
+            if cache_key:
+                await self.response_cache.set(cache_key, orjson.dumps(parsed_response).decode('utf-8'))
+            # Action parameters depend on exact names, dates and addresses, so
+            # only conversational replies are safe to reuse for paraphrases
+            if embedding is not None and "chat_response" in parsed_response:
+                self.semantic_cache.add(embedding, parsed_response)
             
-            # Parse the JSON response
-            return self._parse_llm_response(response.text, user_input)
+            return parsed_response
                 
         except Exception as e:
-            logger.error(f"Error processing user input with LLM: {str(e)}")
+            logger.error("Error processing user input with LLM: %s", e)
             return self._create_fallback_response(user_input)
     
-    def _extract_image_intent(self, user_input: str) -> Optional[Dict[str, Any]]:
+    def _extract_image_intent(self, user_input: str, user_lower: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Extract image creation intent using regex patterns
         
         Args:
             user_input (str): User input text
+            user_lower (Optional[str]): Lowercased input if the caller already has it
             
         Returns:
             Optional[Dict[str, Any]]: Extracted image parameters or None
         """
         try:
-            user_lower = user_input.lower()
+            if user_lower is None:
+                user_lower = user_input.lower()
             
-            # Check for image creation keywords
-            image_create_keywords = [
-                'create', 'generate', 'make', 'draw', 'paint', 'design', 'produce'
-            ]
-            image_nouns = [
-                'image', 'picture', 'photo', 'artwork', 'drawing', 'painting', 'illustration'
-            ]
-            
-            # Check if it's an image creation request
-            has_create_keyword = any(keyword in user_lower for keyword in image_create_keywords)
-            has_image_keyword = any(keyword in user_lower for keyword in image_nouns)
-            
-            # Also check for direct patterns like "I want to create a Image"
-            direct_patterns = [
-                r'(?:create|generate|make|draw)\s+(?:an?\s+)?(?:image|picture|photo|artwork|drawing|painting|illustration)',
-                r'(?:i\s+want\s+to\s+)?(?:create|generate|make|draw)\s+(?:a\s+)?(?:image|picture|photo)',
-                r'(?:text\s+to\s+image|image\s+generation|ai\s+art)'
-            ]
-            
-            is_image_request = has_create_keyword and has_image_keyword
-            for pattern in direct_patterns:
-                if re.search(pattern, user_lower):
-                    is_image_request = True
-                    break
+            # Check if it's an image creation request, or a direct pattern like "I want to create a Image"
+            is_image_request = (
+                (IMAGE_CREATE_KEYWORDS.search(user_lower) and IMAGE_NOUN_KEYWORDS.search(user_lower))
+                or any(pattern.search(user_lower) for pattern in IMAGE_REQUEST_PATTERNS)
+            )
             
             if not is_image_request:
                 return None
@@ -323,39 +777,21 @@ Now analyze: "{user_input}"
             
             # Extract style if mentioned
             style = "realistic"  # default
-            style_patterns = {
-                'cartoon': r'cartoon|anime|animated',
-                'realistic': r'realistic|photographic|photo',
-                'digital art': r'digital\s+art|digital',
-                'oil painting': r'oil\s+painting|painting',
-                'watercolor': r'watercolor|water\s+color',
-                'sketch': r'sketch|pencil|drawing',
-                'abstract': r'abstract',
-                'vintage': r'vintage|retro|old',
-                'modern': r'modern|contemporary'
-            }
-            
-            for style_name, pattern in style_patterns.items():
-                if re.search(pattern, user_lower):
-                    style = style_name
-                    break
+            matched_styles = {match.lastindex for match in IMAGE_STYLE_PATTERN.finditer(user_lower)}
+            if matched_styles:
+                style = IMAGE_STYLE_NAMES[min(matched_styles) - 1]
             
             # Extract number of images
             num_images = 1
-            num_match = re.search(r'(\d+)\s+images?', user_lower)
+            num_match = IMAGE_COUNT_PATTERN.search(user_lower)
             if num_match:
                 num_images = int(num_match.group(1))
                 num_images = min(num_images, 4)  # Limit to 4 images max
             
             # Extract size if mentioned
             size = "1024x1024"  # default
-            size_patterns = [
-                r'(\d+x\d+)',
-                r'(\d+\s*[x×]\s*\d+)',
-            ]
-            
-            for pattern in size_patterns:
-                match = re.search(pattern, user_input)
+            for pattern in IMAGE_SIZE_PATTERNS:
+                match = pattern.search(user_input)
                 if match:
                     size = match.group(1).replace(' ', '').replace('×', 'x')
                     break
@@ -377,75 +813,57 @@ Now analyze: "{user_input}"
             }
             
         except Exception as e:
-            logger.error(f"Error in regex image extraction: {str(e)}")
+            logger.error("Error in regex image extraction: %s", e)
             return None
     
     def _extract_image_prompt(self, user_input: str) -> Optional[str]:
         """Extract the image description from user input"""
         try:
-            # Remove common prefixes and extract the actual description
-            cleaned_input = user_input.lower()
-            
-            # Patterns to remove from the beginning
-            removal_patterns = [
-                r'^(?:i\s+want\s+to\s+)?(?:create|generate|make|draw|paint|design|produce)\s+(?:an?\s+)?(?:image|picture|photo|artwork|drawing|painting|illustration)\s+(?:of\s+)?',
-                r'^(?:create|generate|make|draw|paint|design|produce)\s+(?:an?\s+)?(?:image|picture|photo|artwork|drawing|painting|illustration)\s+(?:of\s+)?',
-                r'^(?:i\s+want\s+to\s+)?(?:create|generate|make|draw)\s+(?:a\s+)?(?:image|picture|photo)\s+',
-                r'^(?:can\s+you\s+)?(?:create|generate|make|draw)\s+'
-            ]
-            
+            # Remove common request prefixes from the beginning
             description = user_input
-            for pattern in removal_patterns:
-                description = re.sub(pattern, '', description, flags=re.IGNORECASE).strip()
+            for pattern in IMAGE_PROMPT_PREFIX_PATTERNS:
+                description = pattern.sub('', description).strip()
             
             # Remove style information and other modifiers to get clean prompt
-            style_removals = [
-                r'\s+in\s+(?:cartoon|realistic|digital\s+art|oil\s+painting|watercolor|sketch|abstract|vintage|modern)\s+style',
-                r'\s+style\s*$',
-                r'\s+(?:\d+x\d+|\d+\s*[x×]\s*\d+)',
-                r'\s+(?:high|low|medium)\s+quality',
-                r'\s+\d+\s+images?'
-            ]
-            
-            for pattern in style_removals:
-                description = re.sub(pattern, '', description, flags=re.IGNORECASE).strip()
+            for pattern in IMAGE_PROMPT_MODIFIER_PATTERNS:
+                description = pattern.sub('', description).strip()
             
             # Clean up extra spaces and common words
-            description = re.sub(r'\s+', ' ', description).strip()
-            description = re.sub(r'^(?:a\s+|an\s+|the\s+)', '', description, flags=re.IGNORECASE).strip()
+            description = ' '.join(description.split())
+            description = LEADING_ARTICLE_PATTERN.sub('', description).strip()
             
             return description if len(description) > 2 else None
             
         except Exception as e:
-            logger.error(f"Error extracting image prompt: {str(e)}")
+            logger.error("Error extracting image prompt: %s", e)
             return None
 
-    def _extract_email_intent(self, user_input: str) -> Optional[Dict[str, Any]]:
+    def _extract_email_intent(self, user_input: str, user_lower: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Extract email sending intent using regex patterns
         
         Args:
             user_input (str): User input text
+            user_lower (Optional[str]): Lowercased input if the caller already has it
             
         Returns:
             Optional[Dict[str, Any]]: Extracted email parameters or None
         """
         try:
-            user_lower = user_input.lower()
-            
-            # Check for email sending keywords
-            email_send_keywords = ['send', 'email', 'mail', 'message', 'write to', 'contact']
-            if not any(keyword in user_lower for keyword in email_send_keywords):
+            # Most messages contain no address at all; reject them before any other work
+            if '@' not in user_input:
                 return None
             
-            # Extract email addresses
-            email_pattern = r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
-            emails = re.findall(email_pattern, user_input)
+            # Take the first email address found
+            email_match = EMAIL_ADDRESS_PATTERN.search(user_input)
+            if not email_match:
+                return None
             
-            if not emails:
+            # Check for email sending keywords
+            if not EMAIL_SEND_KEYWORDS.search(user_lower if user_lower is not None else user_input.lower()):
                 return None
             
-            to_email = emails[0]  # Take the first email found
+            to_email = email_match.group(1)
             
             # Extract subject and body
             subject = None
@@ -453,45 +871,36 @@ Now analyze: "{user_input}"
             message_content = None
             
             # Look for explicit subject patterns
-            subject_patterns = [
-                r'with\s+subject\s+["\']?([^"\']+)["\']?',
-                r'subject:\s*["\']?([^"\']+)["\']?',
-                r'subject\s+["\']?([^"\']+)["\']?'
-            ]
-            
-            for pattern in subject_patterns:
-                match = re.search(pattern, user_input, re.IGNORECASE)
+            for pattern in EMAIL_SUBJECT_PATTERNS:
+                match = pattern.search(user_input)
                 if match:
                     subject = match.group(1).strip()
                     break
             
             # Extract message content
-            message_patterns = [
-                r'say\s+to\s+him\s+(.+?)(?:\s+(?:with|and)|$)',
-                r'say\s+to\s+her\s+(.+?)(?:\s+(?:with|and)|$)',
-                r'say\s+(.+?)(?:\s+(?:with|and)|$)',
-                r'message\s+["\']?([^"\']+)["\']?',
-                r'tell\s+(?:him|her|them)\s+(.+?)(?:\s+(?:with|and)|$)',
-                r'write\s+(.+?)(?:\s+(?:with|and)|$)'
-            ]
-            
-            for pattern in message_patterns:
-                match = re.search(pattern, user_input, re.IGNORECASE)
+            for pattern in EMAIL_MESSAGE_PATTERNS:
+                match = pattern.search(user_input)
                 if match:
                     message_content = match.group(1).strip()
                     # Clean up common endings
-                    message_content = re.sub(r'\s+to\s+' + re.escape(to_email) + r'.*$', '', message_content, flags=re.IGNORECASE)
+                    for suffix in EMAIL_RECIPIENT_SUFFIX_PATTERN.finditer(message_content):
+                        if suffix.group(1).lower() == to_email.lower():
+                            message_content = message_content[:suffix.start()]
+                            break
                     body = message_content
                     break
             
             # If no specific message found, try to extract everything after "email to"
             if not body:
-                after_email_pattern = r'email\s+to\s+' + re.escape(to_email) + r'\s+(.+?)$'
-                match = re.search(after_email_pattern, user_input, re.IGNORECASE)
+                match = next(
+                    (m for m in EMAIL_AFTER_RECIPIENT_PATTERN.finditer(user_input)
+                     if m.group(1).lower() == to_email.lower()),
+                    None
+                )
                 if match:
-                    remaining_text = match.group(1).strip()
+                    remaining_text = match.group(2).strip()
                     # Remove common words like "say", "tell", "with"
-                    remaining_text = re.sub(r'^(?:say\s+to\s+(?:him|her|them)\s+|tell\s+(?:him|her|them)\s+|say\s+|tell\s+|with\s+)', '', remaining_text, flags=re.IGNORECASE)
+                    remaining_text = EMAIL_LEADING_VERB_PATTERN.sub('', remaining_text)
                     if remaining_text:
                         body = remaining_text
                         message_content = remaining_text
@@ -527,69 +936,101 @@ Now analyze: "{user_input}"
             }
             
         except Exception as e:
-            logger.error(f"Error in regex email extraction: {str(e)}")
+            logger.error("Error in regex email extraction: %s", e)
             return None
     
-    def _parse_llm_response(self, response_text: str, user_input: str) -> Dict[str, Any]:
-        """Parse LLM response and extract JSON"""
-        try:
-            import json
-            
-            # Clean the response text
-            response_text = response_text.strip()
-            
-            # Try to find JSON in the response
-            json_patterns = [
-                r'```json\s*(.*?)\s*```',  # JSON in code blocks
-                r'```\s*(.*?)\s*```',      # Generic code blocks
-                r'(\{.*\})',               # Direct JSON objects
-            ]
-            
-            json_text = None
-            for pattern in json_patterns:
-                match = re.search(pattern, response_text, re.DOTALL)
-                if match:
-                    json_text = match.group(1)
-                    break
-            
-            if not json_text:
-                json_text = response_text
-            
-            # Parse JSON
-            parsed_response = json.loads(json_text)
-            
-            # Validate required fields
-            if not isinstance(parsed_response, dict):
-                raise ValueError("Response is not a dictionary")
-            
-            # Ensure required fields exist
-            parsed_response.setdefault("intent", "general_chat")
-            parsed_response.setdefault("confidence", 0.7)
-            parsed_response.setdefault("parameters", {})
-            parsed_response.setdefault("response_text", "I'll help you with that.")
-            parsed_response.setdefault("requires_clarification", False)
-            parsed_response.setdefault("clarification_questions", [])
-            parsed_response.setdefault("suggested_actions", [])
-            
-            logger.info(f"LLM analysis complete - Intent: {parsed_response.get('intent')}")
-            return parsed_response
+    def _strip_json_fence(self, response_text: str) -> str:
+        """
+        Return the JSON inside a markdown code fence, or the text unchanged
+        
+        Structured output should not be fenced, so unfenced text returns
+        after one substring check; fenced text is sliced between its outer
+        braces instead of being matched with a backtracking regex.
+        """
+        if "```" not in response_text:
+            return response_text
+        start = response_text.find("{")
+        end = response_text.rfind("}")
+        return response_text[start:end + 1] if 0 <= start < end else response_text
+    
+    def _parse_function_call(
+        self,
+        function_calls: Optional[List[types.FunctionCall]],
+        response_text: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Turn the intent function call into the analysis dict used by the agent
+        
+        Args:
+            function_calls (Optional[List[types.FunctionCall]]): Function calls from the model
+            response_text (str): Plain text from the model, if it made no call
             
-        except (json.JSONDecodeError, ValueError) as e:
-            logger.error(f"Failed to parse LLM JSON response: {e}")
-            logger.error(f"Raw response: {response_text}")
-            return self._create_fallback_response(user_input)
+        Returns:
+            Optional[Dict[str, Any]]: Analysis with intent and parameters, or None if unusable
+        """
+        if function_calls:
+            if len(function_calls) > 1:
+                logger.info("LLM returned %d function calls, dispatching the first", len(function_calls))
+            name = function_calls[0].name
+            args = function_calls[0].args or {}
+        elif response_text:
+            # The model answered in plain text despite the forced call
+            name, args = "general_chat", {"response_text": response_text}
+        else:
+            logger.error("Empty response from LLM")
+            return None
+        
+        if name not in INTENT_FUNCTIONS:
+            logger.error("LLM called unknown function: %s", name)
+            return None
+        
+        if name == "general_chat":
+            response_text = args.get("response_text") or "I'm here to help!"
+            clarification_questions = list(args.get("clarification_questions") or [])
+            parsed_response = {
+                "intent": name,
+                "confidence": 0.95,
+                "parameters": {},
+                "response_text": response_text,
+                "requires_clarification": bool(clarification_questions),
+                "clarification_questions": clarification_questions,
+                "suggested_actions": []
+            }
+            # Conversational replies come back already shaped as the final response
+            parsed_response["chat_response"] = {
+                "text": response_text,
+                "success": True,
+                "requires_clarification": parsed_response["requires_clarification"],
+                "clarification_questions": clarification_questions
+            }
+        else:
+            try:
+                parameters = IntentParameters.model_validate(args).model_dump(exclude_none=True)
+            except ValidationError as e:
+                logger.error("Invalid arguments for %s: %s", name, e)
+                return None
+            parsed_response = {
+                "intent": name,
+                "confidence": 0.95,
+                "parameters": parameters,
+                "response_text": "I'll take care of that.",
+                "requires_clarification": False,
+                "clarification_questions": [],
+                "suggested_actions": []
+            }
+        
+        logger.info("LLM analysis complete - Intent: %s", name)
+        return parsed_response
     
-    def _create_fallback_response(self, user_input: str) -> Dict[str, Any]:
+    def _create_fallback_response(self, user_input: str, user_lower: Optional[str] = None) -> Dict[str, Any]:
         """Create a fallback response when parsing fails"""
         
         # Simple keyword-based intent detection as fallback
-        user_lower = user_input.lower()
+        if user_lower is None:
+            user_lower = user_input.lower()
         
         # Check for image creation keywords first
-        image_create_keywords = ['create', 'generate', 'make', 'draw', 'paint', 'design', 'produce']
-        image_nouns = ['image', 'picture', 'photo', 'artwork', 'drawing', 'painting', 'illustration']
-        
-        if any(keyword in user_lower for keyword in image_create_keywords) and any(keyword in user_lower for keyword in image_nouns):
+        if IMAGE_CREATE_KEYWORDS.search(user_lower) and IMAGE_NOUN_KEYWORDS.search(user_lower):
             # Try to extract image prompt
             prompt = self._extract_image_prompt(user_input)
             if prompt:
@@ -610,26 +1051,17 @@ Now analyze: "{user_input}"
                 }
         
         # Check for email sending keywords
-        email_send_keywords = ['send', 'email', 'mail', 'message', 'write to', 'contact']
-        if any(keyword in user_lower for keyword in email_send_keywords):
+        if EMAIL_SEND_KEYWORDS.search(user_lower):
             # Try to extract email address
-            email_pattern = r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
-            emails = re.findall(email_pattern, user_input)
+            emails = EMAIL_ADDRESS_PATTERN.findall(user_input)
             
             if emails:
                 to_email = emails[0]
                 
                 # Try to extract message content
                 message_content = ""
-                message_patterns = [
-                    r'say\s+to\s+(?:him|her|them)\s+(.+?)(?:\s+(?:with|and)|$)',
-                    r'say\s+(.+?)(?:\s+(?:with|and)|$)',
-                    r'message\s+["\']?([^"\']+)["\']?',
-                    r'tell\s+(?:him|her|them)\s+(.+?)(?:\s+(?:with|and)|$)'
-                ]
-                
-                for pattern in message_patterns:
-                    match = re.search(pattern, user_input, re.IGNORECASE)
+                for pattern in EMAIL_MESSAGE_PATTERNS:
+                    match = pattern.search(user_input)
                     if match:
                         message_content = match.group(1).strip()
                         break
@@ -658,10 +1090,7 @@ Now analyze: "{user_input}"
                 }
         
         # Check for email-related keywords for retrieval
-        email_keywords = ['email', 'emails', 'inbox', 'unread', 'messages', 'mail']
-        email_action_keywords = ['show', 'check', 'get', 'read', 'list', 'came', 'received']
-        
-        if any(word in user_lower for word in email_keywords) and any(word in user_lower for word in email_action_keywords):
+        if EMAIL_READ_KEYWORDS.search(user_lower) and EMAIL_ACTION_KEYWORDS.search(user_lower):
             # Extract basic email parameters
             parameters = {
                 "max_results": 10,
@@ -692,41 +1121,27 @@ Now analyze: "{user_input}"
             }
         
         # Check for calendar creation keywords
-        elif any(word in user_lower for word in ['create', 'add', 'schedule', 'meeting', 'event', 'appointment']):
+        elif CALENDAR_CREATE_KEYWORDS.search(user_lower):
             # Try to extract basic info for calendar creation
             
             # Extract potential time patterns
-            time_patterns = [
-                r'(\d{1,2}:\d{2}\s*(?:am|pm))',
-                r'(\d{1,2}\s*(?:am|pm))',
-                r'(\d{1,2}:\d{2})',
-            ]
-            
             time_found = None
-            for pattern in time_patterns:
-                match = re.search(pattern, user_input, re.IGNORECASE)
+            for pattern in TIME_PATTERNS:
+                match = pattern.search(user_input)
                 if match:
                     time_found = match.group(1)
                     break
             
             # Extract date patterns
-            date_patterns = [
-                r'(tomorrow)',
-                r'(today)',
-                r'(next\s+\w+)',
-                r'(\w+day)',
-            ]
-            
             date_found = None
-            for pattern in date_patterns:
-                match = re.search(pattern, user_input, re.IGNORECASE)
+            for pattern in DATE_PATTERNS:
+                match = pattern.search(user_input)
                 if match:
                     date_found = match.group(1)
                     break
             
             # Extract email patterns
-            email_pattern = r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
-            emails = re.findall(email_pattern, user_input)
+            emails = EMAIL_ADDRESS_PATTERN.findall(user_input)
             
             # Determine title
             title = "Meeting"
@@ -760,21 +1175,29 @@ Now analyze: "{user_input}"
                 "suggested_actions": ["create_calendar_event"]
             }
         
+        response_text = "I can help you with calendar events, emails, and image creation. Could you be more specific about what you'd like me to do?"
         return {
             "intent": "general_chat",
             "confidence": 0.7,
             "parameters": {},
-            "response_text": "I can help you with calendar events, emails, and image creation. Could you be more specific about what you'd like me to do?",
+            "response_text": response_text,
             "requires_clarification": False,
             "clarification_questions": [],
-            "suggested_actions": []
+            "suggested_actions": [],
+            "chat_response": {
+                "text": response_text,
+                "success": True,
+                "requires_clarification": False,
+                "clarification_questions": []
+            }
         }
     
     # Rest of the methods remain the same...
     async def generate_response(
         self, 
         prompt: str, 
-        max_tokens: int = 500
+        max_tokens: int = 500,
+        config: Optional[types.GenerateContentConfig] = None
     ) -> Optional[str]:
         """
         Generate a general response using the LLM
@@ -782,6 +1205,7 @@ Now analyze: "{user_input}"
         Args:
             prompt (str): The prompt to send to the LLM
             max_tokens (int): Maximum number of tokens in response
+            config (Optional[types.GenerateContentConfig]): Generation config (temperature 0 configs are cached)
             
         Returns:
             Optional[str]: Generated response text
@@ -789,20 +1213,17 @@ Now analyze: "{user_input}"
         try:
             logger.info("Generating LLM response...")
             
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=prompt
-            )
+            response_text = await self._cached_generate(prompt, config)
             
-            if response and response.text:
+            if response_text:
                 logger.info("LLM response generated successfully")
-                return response.text.strip()
+                return response_text.strip()
             else:
                 logger.error("Empty response from LLM")
                 return None
                 
         except Exception as e:
-            logger.error(f"Error generating LLM response: {str(e)}")
+            logger.error("Error generating LLM response: %s", e)
             return None
     
     async def create_email_content(
@@ -823,51 +1244,25 @@ Now analyze: "{user_input}"
             Optional[Dict[str, str]]: Dictionary with 'subject' and 'body'
         """
         try:
-            logger.info(f"Creating email content for purpose: {purpose}")
+            logger.info("Creating email content for purpose: %s", purpose)
             
-            prompt = f"""
-Create a professional email with the following details:
-
-Purpose: {purpose}
+            prompt = f"""Purpose: {purpose}
 Recipient: {recipient_name}
 Additional Details: {additional_details}
-
-Generate a response in JSON format:
-{{
-    "subject": "Professional email subject",
-    "body": "Professional email body with proper formatting"
-}}
-
-Guidelines:
-- Use professional tone
-- Include proper greeting and closing
-- Be clear and concise
-- Include all relevant information from additional_details
-- Format for easy reading
 """
 
-            response = await self.generate_response(prompt)
-            if not response:
+            response_text = await self._cached_generate(prompt, self.email_config)
+            if not response_text:
                 return None
             
             try:
-                import json
-                # Clean and parse response
-                response_text = response.strip()
-                if response_text.startswith("```json"):
-                    response_text = response_text.split("```json")[1].split("```")[0]
-                elif response_text.startswith("```"):
-                    response_text = response_text.split("```")[1].split("```")[0]
-                
-                email_content = json.loads(response_text)
-                return email_content
-                
-            except json.JSONDecodeError:
-                logger.error("Failed to parse email content JSON")
+                return EmailContent.model_validate_json(self._strip_json_fence(response_text)).model_dump()
+            except ValidationError:
+                logger.error("Failed to validate email content JSON")
                 return None
                 
         except Exception as e:
-            logger.error(f"Error creating email content: {str(e)}")
+            logger.error("Error creating email content: %s", e)
             return None
     
     async def create_image_prompt_enhancement(
@@ -888,7 +1283,7 @@ Guidelines:
             str: Enhanced prompt for better image generation
         """
         try:
-            logger.info(f"Enhancing image prompt: {basic_prompt}")
+            logger.info("Enhancing image prompt: %s", basic_prompt)
             
             enhancement_prompt = f"""
 You are an expert at creating detailed prompts for AI image generation. 
@@ -913,7 +1308,7 @@ Return only the enhanced prompt, no additional text.
             return enhanced.strip() if enhanced else basic_prompt
             
         except Exception as e:
-            logger.error(f"Error enhancing image prompt: {str(e)}")
+            logger.error("Error enhancing image prompt: %s", e)
             return basic_prompt
     
     async def format_calendar_event_response(
@@ -924,6 +1319,9 @@ Return only the enhanced prompt, no additional text.
         """
         Format a response for calendar operations
         
+        Common actions are rendered from a local template; the LLM is only
+        used when the action or event details don't fit one.
+        
         Args:
             event_details (Dict[str, Any]): Event details
             action (str): Action performed (created, updated, deleted, etc.)
@@ -931,26 +1329,28 @@ Return only the enhanced prompt, no additional text.
         Returns:
             str: Formatted response text
         """
+        template = CALENDAR_RESPONSE_TEMPLATES.get(action)
+        if template:
+            fields = {key: value for key, value in event_details.items() if value}
+            duration = fields.get("duration")
+            attendees = fields.get("attendees")
+            fields["duration_suffix"] = f" ({duration})" if duration else ""
+            fields["attendees_suffix"] = f" with {', '.join(attendees)}" if attendees else ""
+            try:
+                return template.format_map(fields)
+            except KeyError:
+                pass
+        
         try:
-            prompt = f"""
-Create a friendly confirmation message for a calendar event that was {action}.
-
+            prompt = f"""Action: {action}
 Event Details: {event_details}
-
-Create a conversational response that:
-- Confirms the action was completed
-- Summarizes the key event details
-- Offers helpful next steps or suggestions
-- Maintains a helpful, professional tone
-
-Keep it concise but informative.
 """
             
-            response = await self.generate_response(prompt)
+            response = await self.generate_response(prompt, config=self.confirmation_config)
             return response or f"Calendar event {action} successfully."
             
         except Exception as e:
-            logger.error(f"Error formatting calendar response: {str(e)}")
+            logger.error("Error formatting calendar response: %s", e)
             return f"Calendar event {action} successfully."
 
     async def format_email_list_response(
@@ -974,13 +1374,13 @@ Keep it concise but informative.
             if not emails:
                 return f"No {query_type} found."
             
-            response = f"Found {total_count} {query_type}:\n\n"
+            parts = [f"Found {total_count} {query_type}:\n\n"]
             
             for i, email in enumerate(emails[:10], 1):  # Show max 10 emails in summary
                 sender = email.get('sender', 'Unknown Sender')
                 # Clean sender name (remove email part if present)
                 if '<' in sender:
-                    sender = sender.split('<')[0].strip()
+                    sender = sender.partition('<')[0].strip()
                 
                 subject = email.get('subject', 'No Subject')
                 snippet = email.get('snippet', '')
@@ -990,27 +1390,29 @@ Keep it concise but informative.
                 formatted_date = ""
                 if date:
                     try:
-                        from datetime import datetime
                         # Basic date formatting - you might want to improve this
                         formatted_date = f" - {date.split(',')[1].strip() if ',' in date else date}"
                     except:
                         formatted_date = f" - {date}"
                 
-                response += f"{i}. **{subject}**\n"
-                response += f"   From: {sender}{formatted_date}\n"
+                parts.append(f"{i}. **{subject}**\n")
+                parts.append(f"   From: {sender}{formatted_date}\n")
                 if snippet:
-                    response += f"   Preview: {snippet[:80]}{'...' if len(snippet) > 80 else ''}\n"
-                response += "\n"
+                    parts.append(f"   Preview: {snippet[:80]}{'...' if len(snippet) > 80 else ''}\n")
+                parts.append("\n")
             
             if total_count > 10:
-                response += f"... and {total_count - 10} more emails.\n"
+                parts.append(f"... and {total_count - 10} more emails.\n")
+            
+            parts.append("\nWould you like me to help you with any specific email operations?")
             
-            response += "\nWould you like me to help you with any specific email operations?"
+            # Build the text in one pass instead of repeated concatenation
+            response = "".join(parts)
             
             return response
             
         except Exception as e:
-            logger.error(f"Error formatting email list response: {str(e)}")
+            logger.error("Error formatting email list response: %s", e)
             return f"Found {total_count} {query_type}. Use specific commands to interact with them."
     
     async def format_image_creation_response(
@@ -1038,22 +1440,24 @@ Keep it concise but informative.
             style = image_details.get('style', 'realistic')
             num_images = image_details.get('num_images', 1)
             
-            response = f"✅ Successfully created {'an image' if num_images == 1 else f'{num_images} images'} of '{prompt}' in {style} style!"
+            parts = [f"✅ Successfully created {'an image' if num_images == 1 else f'{num_images} images'} of '{prompt}' in {style} style!"]
             
             if image_path:
-                response += f"\n\n📁 Image saved at: {image_path}"
+                parts.append(f"\n\n📁 Image saved at: {image_path}")
             
-            response += f"\n\n🎨 Style: {style.title()}"
-            response += f"\n📐 Size: {image_details.get('size', '1024x1024')}"
-            response += f"\n⚡ Quality: {image_details.get('quality', 'high').title()}"
+            parts.append(f"\n\n🎨 Style: {style.title()}")
+            parts.append(f"\n📐 Size: {image_details.get('size', '1024x1024')}")
+            parts.append(f"\n⚡ Quality: {image_details.get('quality', 'high').title()}")
             
-            response += "\n\nWould you like me to create any variations or make any adjustments to the image?"
+            parts.append("\n\nWould you like me to create any variations or make any adjustments to the image?")
             
-            return response
+            return "".join(parts)
             
         except Exception as e:
-            logger.error(f"Error formatting image creation response: {str(e)}")
+            logger.error("Error formatting image creation response: %s", e)
             return "Image created successfully!"
 
-# Create global instance
-llm_handler = LLMHandler()
\ No newline at end of file
+@functools.cache
+def get_llm_handler() -> LLMHandler:
+    """Get the shared LLM handler, creating it (and its Gemini client) on first use"""
+    return LLMHandler()
\ No newline at end of file
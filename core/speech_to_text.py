@@ -1,6 +1,6 @@
 import base64
 import os
-from typing import Optional
+from typing import AsyncIterator, Optional
 from google import genai
 from google.genai import types
 from config.settings import settings
@@ -17,6 +17,84 @@ class SpeechToTextService:
         self.model = settings.GEMINI_STT_MODEL
         logger.info("SpeechToTextService initialized")
     
+    async def transcribe_audio_stream(self, audio_file_path: str) -> AsyncIterator[str]:
+        """
+        Transcribe an audio file, yielding the transcript as it grows
+        
+        Each yielded value is the full transcript received so far. API errors
+        are raised to the caller.
+        
+        Args:
+            audio_file_path (str): The path to the audio file to transcribe.
+            
+        Yields:
+            str: Transcript text received so far
+        """
+        logger.info(f"Starting transcription for file: {audio_file_path}")
+        
+        # Check if the audio file exists
+        if not os.path.exists(audio_file_path):
+            logger.error(f"Audio file '{audio_file_path}' does not exist")
+            return
+        
+        # Read the audio file in binary mode and encode it in base64
+        with open(audio_file_path, "rb") as audio_file:
+            audio_bytes = audio_file.read()
+            audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
+        
+        logger.info(f"Audio file size: {len(audio_bytes)} bytes")
+        
+        # Determine MIME type based on file extension
+        file_extension = os.path.splitext(audio_file_path)[1].lower()
+        mime_type_map = {
+            '.wav': 'audio/wav',
+            '.mp3': 'audio/mpeg',
+            '.m4a': 'audio/mp4',
+            '.ogg': 'audio/ogg',
+            '.flac': 'audio/flac'
+        }
+        
+        mime_type = mime_type_map.get(file_extension, 'audio/wav')
+        logger.info(f"Using MIME type: {mime_type}")
+        
+        # Define the content parts for the multimodal input
+        contents = [
+            types.Content(
+                role="user",
+                parts=[
+                    types.Part.from_text(
+                        text="Please provide a detailed transcription of the following audio. "
+                             "Do not include any extra commentary, just the transcription."
+                    ),
+                    types.Part(
+                        inline_data=types.Blob(
+                            mime_type=mime_type,
+                            data=audio_base64
+                        )
+                    ),
+                ],
+            ),
+        ]
+        
+        generate_content_config = types.GenerateContentConfig(
+            thinking_config=types.ThinkingConfig(
+                thinking_budget=-1,
+            ),
+        )
+        
+        # Get transcription from Gemini (async stream keeps the event loop free)
+        logger.info("Sending audio to Gemini API for transcription...")
+        
+        transcription_text = ""
+        async for chunk in await self.client.aio.models.generate_content_stream(
+            model=self.model,
+            contents=contents,
+            config=generate_content_config,
+        ):
+            if chunk.text:
+                transcription_text += chunk.text
+                yield transcription_text
+    
     async def transcribe_audio(self, audio_file_path: str) -> Optional[str]:
         """
         Transcribes an audio file using the Gemini 2.5 Pro model.
@@ -28,69 +106,9 @@ class SpeechToTextService:
             Optional[str]: The transcribed text or None if failed
         """
         try:
-            logger.info(f"Starting transcription for file: {audio_file_path}")
-            
-            # Check if the audio file exists
-            if not os.path.exists(audio_file_path):
-                logger.error(f"Audio file '{audio_file_path}' does not exist")
-                return None
-            
-            # Read the audio file in binary mode and encode it in base64
-            with open(audio_file_path, "rb") as audio_file:
-                audio_bytes = audio_file.read()
-                audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
-            
-            logger.info(f"Audio file size: {len(audio_bytes)} bytes")
-            
-            # Determine MIME type based on file extension
-            file_extension = os.path.splitext(audio_file_path)[1].lower()
-            mime_type_map = {
-                '.wav': 'audio/wav',
-                '.mp3': 'audio/mpeg',
-                '.m4a': 'audio/mp4',
-                '.ogg': 'audio/ogg',
-                '.flac': 'audio/flac'
-            }
-            
-            mime_type = mime_type_map.get(file_extension, 'audio/wav')
-            logger.info(f"Using MIME type: {mime_type}")
-            
-            # Define the content parts for the multimodal input
-            contents = [
-                types.Content(
-                    role="user",
-                    parts=[
-                        types.Part.from_text(
-                            text="Please provide a detailed transcription of the following audio. "
-                                 "Do not include any extra commentary, just the transcription."
-                        ),
-                        types.Part(
-                            inline_data=types.Blob(
-                                mime_type=mime_type,
-                                data=audio_base64
-                            )
-                        ),
-                    ],
-                ),
-            ]
-            
-            generate_content_config = types.GenerateContentConfig(
-                thinking_config=types.ThinkingConfig(
-                    thinking_budget=-1,
-                ),
-            )
-            
-            # Get transcription from Gemini
-            logger.info("Sending audio to Gemini API for transcription...")
-            
             transcription_text = ""
-            for chunk in self.client.models.generate_content_stream(
-                model=self.model,
-                contents=contents,
-                config=generate_content_config,
-            ):
-                if chunk.text:
-                    transcription_text += chunk.text
+            async for transcription_text in self.transcribe_audio_stream(audio_file_path):
+                pass
             
             if transcription_text.strip():
                 logger.info(f"Transcription successful: {transcription_text[:100]}...")
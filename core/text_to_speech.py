@@ -1,15 +1,19 @@
+import asyncio
 import requests
 import wave
 import base64
-import json
 import os
 import uuid
-from typing import Optional
+import orjson
+from typing import List, Optional, Tuple
 from config.settings import settings
 from config.logging_config import get_logger
 
 logger = get_logger('speech_service')
 
+# Most requests synthesized together in one batch
+TTS_BATCH_MAX = 8
+
 class TextToSpeechService:
     """Service for converting text to speech using Gemini TTS"""
     
@@ -94,11 +98,12 @@ class TextToSpeechService:
             
             logger.info("Sending request to Gemini TTS API...")
             
-            # Make API request
-            response = requests.post(
+            # Make API request off the event loop so other work can overlap with it
+            response = await asyncio.to_thread(
+                requests.post,
                 url, 
                 headers=headers, 
-                data=json.dumps(payload),
+                data=orjson.dumps(payload),
                 timeout=60
             )
             
@@ -106,7 +111,8 @@ class TextToSpeechService:
                 logger.error(f"TTS API error: {response.status_code} - {response.text}")
                 return None
             
-            result = response.json()
+            # The body carries base64 audio, so parse the raw bytes with orjson
+            result = orjson.loads(response.content)
             
             # Extract audio data
             if 'candidates' not in result or not result['candidates']:
@@ -199,6 +205,108 @@ class TextToSpeechService:
         cleaned_text = text.replace("*", "").replace("#", "").strip()
         
         return await self.generate_speech(cleaned_text)
+    
+    async def generate_speech_batch(self, texts: List[str]) -> List[Optional[str]]:
+        """
+        Generate speech for several responses at once
+        
+        The Gemini TTS endpoint takes one text per request, so distinct texts
+        are synthesized concurrently and duplicates share a single request.
+        
+        Args:
+            texts (List[str]): Response texts to convert to speech
+            
+        Returns:
+            List[Optional[str]]: Audio file path (or None) for each text, in order
+        """
+        unique_texts = list(dict.fromkeys(texts))
+        results = await asyncio.gather(
+            *(self.generate_speech_for_response(text) for text in unique_texts),
+            return_exceptions=True
+        )
+        
+        paths = {}
+        for text, result in zip(unique_texts, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error during batched TTS generation: {str(result)}")
+                result = None
+            paths[text] = result
+        
+        return [paths[text] for text in texts]
+
+class TTSBatcher:
+    """Coalesces TTS requests from concurrent users into short batches"""
+    
+    def __init__(self, service: TextToSpeechService, window_ms: int, max_batch: int = TTS_BATCH_MAX):
+        """
+        Initialize the batcher
+        
+        Args:
+            service (TextToSpeechService): Service used to synthesize each batch
+            window_ms (int): How long to collect requests after the first one arrives;
+                0 batches only requests that are already queued and adds no delay
+            max_batch (int): Most requests synthesized together
+        """
+        self.service = service
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue = None
+        self._worker = None
+        self._loop = None
+        
+        # Strong references to in-flight batch tasks
+        self._batch_tasks = set()
+    
+    def _ensure_worker(self) -> None:
+        """Start the collector task on the running event loop if needed"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._collect())
+    
+    async def submit(self, text: str) -> Optional[str]:
+        """
+        Queue a response text for synthesis and wait for its audio
+        
+        Args:
+            text (str): Response text to convert to speech
+            
+        Returns:
+            Optional[str]: Path to generated audio file
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((text, future))
+        return await future
+    
+    async def _collect(self) -> None:
+        """Gather queued requests into batches and hand each batch off"""
+        while True:
+            batch = [await self._queue.get()]
+            if self.window:
+                await asyncio.sleep(self.window)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            
+            # Run the batch in its own task so the next one can start collecting
+            task = asyncio.create_task(self._synthesize(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+    
+    async def _synthesize(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Synthesize a batch and resolve each caller's future"""
+        try:
+            paths = await self.service.generate_speech_batch([text for text, _ in batch])
+        except Exception as e:
+            logger.error(f"Error during batched TTS generation: {str(e)}")
+            paths = [None] * len(batch)
+        
+        for (_, future), path in zip(batch, paths):
+            # Callers may have been cancelled while waiting
+            if not future.done():
+                future.set_result(path)
 
-# Create global instance
-tts_service = TextToSpeechService()
\ No newline at end of file
+# Create global instances
+tts_service = TextToSpeechService()
+tts_batcher = TTSBatcher(tts_service, settings.TTS_BATCH_WINDOW_MS)
\ No newline at end of file
@@ -14,6 +14,18 @@ from routes.router import app
 
 logger = get_logger('main')
 
+def install_event_loop_policy():
+    """Use uvloop where available (Linux/macOS); the stdlib loop stays the fallback on Windows"""
+    if sys.platform.startswith('win'):
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+        return
+    
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
 class AIAgentServer:
     """Main server class that runs both FastAPI and Telegram bot"""
     
@@ -201,9 +213,8 @@ async def run_server():
 def main():
     """Main entry point"""
     try:
-        # Set up event loop policy for Windows
-        if sys.platform.startswith('win'):
-            asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+        # Set up the event loop policy (uvloop, or Proactor on Windows)
+        install_event_loop_policy()
         
         # Run the server
         success = asyncio.run(run_server())
@@ -277,9 +288,11 @@ if __name__ == "__main__":
         
         if command == "telegram":
             # Run only Telegram bot
+            install_event_loop_policy()
             asyncio.run(run_telegram_only())
         elif command == "fastapi":
             # Run only FastAPI server
+            install_event_loop_policy()
             asyncio.run(run_fastapi_only())
         elif command == "dev":
             # Run development server
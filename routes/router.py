@@ -68,6 +68,11 @@ async def shutdown_event():
         cleanup_result = file_handler.cleanup_old_files(max_age_hours=0)
         if cleanup_result["success"]:
             logger.info(f"✅ Shutdown cleanup: {cleanup_result['deleted_count']} files deleted")
+        
+        # Bound the speech cache, which outlives the temp files it was linked from
+        tts_result = await ai_agent.cleanup_tts_cache()
+        if tts_result["success"]:
+            logger.info(f"✅ TTS cache sweep: {tts_result['deleted_count']} files deleted")
     except Exception as e:
         logger.error(f"Error during shutdown cleanup: {str(e)}")
     
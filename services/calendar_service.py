@@ -1,4 +1,5 @@
 import os
+import re
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from dateutil import parser
@@ -112,7 +113,6 @@ class CalendarService:
                 return timedelta(minutes=minutes)
             else:
                 # Try to extract number and assume hours
-                import re
                 numbers = re.findall(r'\d+', duration_str)
                 if numbers:
                     hours = int(numbers[0])
@@ -534,10 +534,10 @@ async def process_user_request(self, user_input: str) -> str:
 
 # Make sure your main agent class initialization includes:
 def __init__(self):
-    from core.llm_handler import llm_handler
+    from core.llm_handler import get_llm_handler
     from email_service import email_service
     
-    self.llm_handler = llm_handler
+    self.llm_handler = get_llm_handler()
     self.email_service = email_service
 
 # Create global instance
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import uuid
 from typing import Dict, Any, Optional
@@ -168,15 +169,16 @@ class ImageEditingService:
                 
                 logger.info("Sending image edit request to Hugging Face API...")
                 
-                # Edit image using the client
-                edited_image = self.client.image_to_image(
+                # Edit image using the client (blocking HTTP, run off the event loop)
+                edited_image = await asyncio.to_thread(
+                    self.client.image_to_image,
                     input_image_data,
                     prompt=enhanced_prompt,
                     model=self.model
                 )
                 
                 # Save edited image
-                edited_image.save(output_file)
+                await asyncio.to_thread(edited_image.save, output_file)
                 
                 # Verify file was created and get size
                 if os.path.exists(output_file):
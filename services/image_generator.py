@@ -1,3 +1,4 @@
+import asyncio
 import os
 import uuid
 from typing import Dict, Any, Optional
@@ -124,14 +125,15 @@ class ImageGenerationService:
             logger.info("Sending request to Hugging Face API...")
             
             try:
-                # Generate image using the client
-                image = self.client.text_to_image(
+                # Generate image using the client (blocking HTTP, run off the event loop)
+                image = await asyncio.to_thread(
+                    self.client.text_to_image,
                     enhanced_prompt,
                     model=self.model
                 )
                 
                 # Save image to file
-                image.save(output_file)
+                await asyncio.to_thread(image.save, output_file)
                 
                 # Verify file was created and get size
                 if os.path.exists(output_file):
@@ -1,7 +1,8 @@
 import os
 import shutil
 import uuid
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
 from config.settings import settings
 from config.logging_config import get_logger
 
@@ -168,12 +169,19 @@ class FileHandler:
             logger.error(f"Error getting file info: {str(e)}")
             return {"exists": False, "error": str(e)}
     
-    def cleanup_old_files(self, max_age_hours: int = 24) -> Dict[str, Any]:
+    def cleanup_old_files(
+        self,
+        max_age_hours: int = 24,
+        exclude_files: Optional[List[str]] = None,
+        max_workers: int = 1
+    ) -> Dict[str, Any]:
         """
         Clean up old temporary files
         
         Args:
             max_age_hours (int): Maximum age in hours for files to keep
+            exclude_files (Optional[List[str]]): File names or paths that must not be deleted
+            max_workers (int): Number of threads used to delete files concurrently
             
         Returns:
             Dict[str, Any]: Cleanup results
@@ -193,25 +201,48 @@ class FileHandler:
             
             current_time = time.time()
             max_age_seconds = max_age_hours * 3600
-            deleted_count = 0
-            freed_space = 0
             
-            for filename in os.listdir(self.temp_dir):
-                file_path = os.path.join(self.temp_dir, filename)
-                
+            excluded = set()
+            for excluded_file in exclude_files or []:
+                excluded.add(excluded_file)
+                excluded.add(os.path.abspath(excluded_file))
+            
+            # Collect expired files; scandir reuses the directory listing's stat data
+            expired_files = []
+            with os.scandir(self.temp_dir) as entries:
+                for entry in entries:
+                    if entry.name in excluded or os.path.abspath(entry.path) in excluded:
+                        continue
+                    
+                    try:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            if current_time - stat.st_mtime > max_age_seconds:
+                                expired_files.append((entry.path, stat.st_size))
+                                
+                    except Exception as e:
+                        logger.error(f"Error processing file {entry.name}: {str(e)}")
+            
+            def remove_file(expired_file):
+                file_path, file_size = expired_file
                 try:
-                    if os.path.isfile(file_path):
-                        file_age = current_time - os.path.getmtime(file_path)
-                        
-                        if file_age > max_age_seconds:
-                            file_size = os.path.getsize(file_path)
-                            os.remove(file_path)
-                            deleted_count += 1
-                            freed_space += file_size
-                            logger.info(f"Deleted old file: {filename}")
-                            
+                    os.remove(file_path)
+                    logger.info(f"Deleted old file: {os.path.basename(file_path)}")
+                    return file_size
                 except Exception as e:
-                    logger.error(f"Error processing file {filename}: {str(e)}")
+                    logger.error(f"Error processing file {os.path.basename(file_path)}: {str(e)}")
+                    return None
+            
+            # Deletions are syscall-bound, so threads overlap them well
+            if max_workers > 1 and len(expired_files) > 1:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    removed_sizes = list(executor.map(remove_file, expired_files))
+            else:
+                removed_sizes = [remove_file(expired_file) for expired_file in expired_files]
+            
+            removed_sizes = [size for size in removed_sizes if size is not None]
+            deleted_count = len(removed_sizes)
+            freed_space = sum(removed_sizes)
             
             freed_space_mb = round(freed_space / (1024 * 1024), 2)
             
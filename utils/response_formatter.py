@@ -1,3 +1,5 @@
+import re
+from datetime import datetime
 from typing import Dict, Any, Optional, List
 from config.logging_config import get_logger
 
@@ -383,20 +385,27 @@ Just tell me what you'd like to do in natural language!"""
         successful_steps = [step for step in steps if step.get("success", False)]
         failed_steps = [step for step in steps if not step.get("success", True)]
         
-        message = f"🔄 **Multi-step Operation Complete**\n\n"
-        message += f"✅ Successful: {len(successful_steps)}\n"
-        message += f"❌ Failed: {len(failed_steps)}\n\n"
+        parts = [
+            f"🔄 **Multi-step Operation Complete**\n\n"
+            f"✅ Successful: {len(successful_steps)}\n"
+            f"❌ Failed: {len(failed_steps)}\n\n"
+        ]
         
         if successful_steps:
-            message += "**Completed Steps:**\n"
-            for i, step in enumerate(successful_steps):
-                message += f"{i+1}. {step.get('description', 'Step completed')}\n"
+            parts.append("**Completed Steps:**\n")
+            parts.extend(
+                f"{i+1}. {step.get('description', 'Step completed')}\n"
+                for i, step in enumerate(successful_steps)
+            )
         
         if failed_steps:
-            message += "\n**Failed Steps:**\n"
-            for i, step in enumerate(failed_steps):
-                error = step.get('error', 'Unknown error')
-                message += f"{i+1}. {step.get('description', 'Step failed')}: {error}\n"
+            parts.append("\n**Failed Steps:**\n")
+            parts.extend(
+                f"{i+1}. {step.get('description', 'Step failed')}: {step.get('error', 'Unknown error')}\n"
+                for i, step in enumerate(failed_steps)
+            )
+        
+        message = "".join(parts)
         
         response = {
             "success": len(successful_steps) > 0,
@@ -459,7 +468,6 @@ Just tell me what you'd like to do in natural language!"""
     
     def _get_timestamp(self) -> str:
         """Get current timestamp"""
-        from datetime import datetime
         return datetime.now().isoformat()
     
     def clean_text_for_tts(self, text: str) -> str:
@@ -476,7 +484,6 @@ Just tell me what you'd like to do in natural language!"""
         cleaned = text.replace("**", "").replace("*", "")
         
         # Remove emojis for TTS (keep letters/numbers/punctuation)
-        import re
         cleaned = re.sub(r'[^\w\s\.,\?!;:\-\(\)]', '', cleaned)
         
         # Clean up multiple spaces
@@ -526,9 +533,9 @@ Just tell me what you'd like to do in natural language!"""
         if len(errors) == 1:
             message = f"⚠️ Validation Error: {errors[0]}"
         else:
-            message = f"⚠️ Validation Errors:\n"
-            for i, error in enumerate(errors):
-                message += f"{i+1}. {error}\n"
+            message = "⚠️ Validation Errors:\n" + "".join(
+                f"{i+1}. {error}\n" for i, error in enumerate(errors)
+            )
         
         response = {
             "success": False,